@@ -2,8 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from core.views import OTPRequestView, OTPVerifyView, AdminVendorViewSet, DevLoginView, UserMeView
 from rfqs.views import RFQViewSet, RFQItemViewSet, VehicleViewSet, PartCatalogViewSet, SavedVehicleViewSet
-from rfqs.pdf_views import RFQPDFView
-from bids.views import BidViewSet, RFQFeedView
+from rfqs.pdf_views import RFQPDFView, RFQPDFJobView, PDFJobView, PDFJobDownloadView, CSExportView
+from bids.views import BidViewSet, RFQFeedView, VendorFeedPreferenceView
 from orders.views import VendorOrderViewSet
 
 router = DefaultRouter()
@@ -23,5 +23,10 @@ urlpatterns = [
     path('auth/dev-login/', DevLoginView.as_view(), name='dev-login'),
     path('auth/me/', UserMeView.as_view(), name='user-me'),
     path('feed/', RFQFeedView.as_view(), name='rfq-feed'),
+    path('feed/preferences/', VendorFeedPreferenceView.as_view(), name='feed-preferences'),
     path('rfqs/<int:pk>/pdf/', RFQPDFView.as_view(), name='rfq-pdf'),
+    path('rfqs/<int:pk>/pdf/jobs/', RFQPDFJobView.as_view(), name='rfq-pdf-job'),
+    path('reports/cs-export/', CSExportView.as_view(), name='cs-export'),
+    path('pdf-jobs/<str:job_id>/', PDFJobView.as_view(), name='pdf-job'),
+    path('pdf-jobs/<str:job_id>/download/', PDFJobDownloadView.as_view(), name='pdf-job-download'),
 ]
@@ -0,0 +1,107 @@
+"""
+Background fan-out of bid events to WebSocket groups.
+
+Bids are handed over after their transaction commits and sent from a worker
+thread, so HTTP requests never wait on the channel layer (with the in-memory
+layer, used without REDIS_URL, they are sent inline instead). Bids for the same
+RFQ that arrive within one tick are coalesced into a single `bids_placed`
+group message, which carries a per-RFQ sequence number (see bids.replay).
+"""
+import logging
+import queue
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections
+
+from .replay import record_event
+
+logger = logging.getLogger(__name__)
+
+
+class BidBroadcaster:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, rfq_id, bid_ids):
+        """Schedule `bid_ids` (all on `rfq_id`) for broadcast on the next tick."""
+        if not self._threaded():
+            self.send({rfq_id: list(bid_ids)})
+            return
+        self._ensure_started()
+        self._queue.put((rfq_id, list(bid_ids)))
+
+    def _threaded(self):
+        """
+        Send from the background thread only when BID_BROADCAST_ASYNC is on and
+        the layer is one that can be used from another thread. InMemoryChannelLayer's
+        queues belong to the server's event loop, so sends to it stay on the caller.
+        """
+        if not getattr(settings, 'BID_BROADCAST_ASYNC', True):
+            return False
+        return not isinstance(get_channel_layer(), InMemoryChannelLayer)
+
+    def _ensure_started(self):
+        # Started lazily so each forked server worker gets its own thread
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if not (self._thread and self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name='bid-broadcaster', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self.send(batch)
+            except Exception:
+                logger.exception("Bid broadcast failed for RFQs %s", list(batch))
+            finally:
+                close_old_connections()
+
+    def _collect(self):
+        """Block for the first event, then gather everything arriving within one tick."""
+        tick = getattr(settings, 'BID_BROADCAST_TICK', 0.1)
+        batch = {}
+        rfq_id, bid_ids = self._queue.get()
+        batch.setdefault(rfq_id, []).extend(bid_ids)
+
+        deadline = time.monotonic() + tick
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                rfq_id, bid_ids = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.setdefault(rfq_id, []).extend(bid_ids)
+        return batch
+
+    def send(self, batch):
+        """Serialize every bid in `batch` ({rfq_id: [bid_id]}) with one query, one group_send per RFQ."""
+        from .models import Bid
+        from .serializers import BidSerializer
+
+        bid_ids = [bid_id for ids in batch.values() for bid_id in ids]
+        bids = Bid.objects.filter(id__in=bid_ids).select_related('vendor', 'rfq_item').order_by('id')
+        by_rfq = {}
+        for bid in bids:
+            by_rfq.setdefault(bid.rfq_item.rfq_id, []).append(BidSerializer(bid).data)
+
+        channel_layer = get_channel_layer()
+        for rfq_id, payload in by_rfq.items():
+            event = {
+                'type': 'bids_placed',
+                'rfq_id': rfq_id,
+                'bids': payload
+            }
+            # Sequenced and buffered so reconnecting clients can catch up
+            record_event(rfq_id, event)
+            async_to_sync(channel_layer.group_send)(f'rfq_{rfq_id}', event)
+
+
+broadcaster = BidBroadcaster()
@@ -1,9 +1,56 @@
 import json
-from channels.generic.websocket import AsyncWebsocketConsumer
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer, AsyncJsonWebsocketConsumer
+from .replay import events_since, current_seq
+
+
+def parse_last_seq(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+@database_sync_to_async
+def can_watch_rfq(user, rfq_id):
+    """Workshops may watch their own RFQs; vendors open RFQs or ones they bid on."""
+    from rfqs.models import RFQ
+    rfqs = RFQ.objects.filter(id=rfq_id)
+    if user.is_staff or user.role == 'ADMIN':
+        return rfqs.exists()
+    if user.role == 'WORKSHOP':
+        return rfqs.filter(workshop=user).exists()
+    if user.role == 'VENDOR':
+        from django.db.models import Exists, OuterRef, Q
+        from .models import Bid
+        has_bid = Bid.objects.filter(rfq_item__rfq=OuterRef('pk'), vendor=user)
+        return rfqs.filter(Q(status=RFQ.Status.BIDDING_OPEN) | Exists(has_bid)).exists()
+    return False
+
+
+def visible_bids(user, bids):
+    """Vendors only see their own bids; workshops and admins every bid."""
+    if user.role == 'VENDOR':
+        return [bid for bid in bids if bid['vendor'] == user.id]
+    return bids
+
 
 class BidConsumer(AsyncWebsocketConsumer):
+    """
+    Single-RFQ socket (ws/rfqs/<id>/?token=<DRF token>[&last_seq=N]), with the
+    same authentication, authorization and per-role filtering as BidStreamConsumer.
+    """
     async def connect(self):
-        self.rfq_id = self.scope['url_route']['kwargs']['rfq_id']
+        self.user = self.scope.get('user')
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.rfq_id = int(self.scope['url_route']['kwargs']['rfq_id'])
+        if not await can_watch_rfq(self.user, self.rfq_id):
+            await self.close(code=4403)
+            return
         self.room_group_name = f'rfq_{self.rfq_id}'
 
         # Join room group
@@ -14,19 +61,115 @@ class BidConsumer(AsyncWebsocketConsumer):
 
         await self.accept()
 
+        # Reconnecting clients pass ?last_seq=N and get only what they missed
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        last_seq = parse_last_seq(query.get('last_seq', [None])[0])
+        if last_seq is not None:
+            events, seq = await sync_to_async(events_since)(self.rfq_id, last_seq)
+            if events is None:
+                await self.send(text_data=json.dumps({'type': 'resync_required', 'seq': seq}))
+            else:
+                for event in events:
+                    await self.bids_placed(event)
+
     async def disconnect(self, close_code):
-        # Leave room group
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        # Leave room group (never joined when the connection was refused)
+        if hasattr(self, 'room_group_name'):
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
 
     # Receive message from room group
     async def bid_placed(self, event):
-        bid = event['bid']
+        await self.bids_placed({'bids': [event['bid']]})
+
+    # Coalesced batch from bids.broadcast; clients still get one frame per bid
+    async def bids_placed(self, event):
+        for bid in visible_bids(self.user, event['bids']):
+            await self.send(text_data=json.dumps({
+                'type': 'bid_placed',
+                'seq': event.get('seq'),
+                'bid': bid
+            }))
+
+
+class BidStreamConsumer(AsyncJsonWebsocketConsumer):
+    """
+    One authenticated socket (ws/bids/?token=<DRF token>) carrying bid events
+    for many RFQs. Clients send
+        {"action": "subscribe", "rfq_id": 12, "last_seq": 40}
+        {"action": "unsubscribe", "rfq_id": 12}
+    and receive {"type": "bids_placed", "rfq_id": 12, "seq": 41, "bids": [...]}.
+    With last_seq the missed events are replayed first, or
+    {"type": "resync_required"} is sent if they are no longer buffered.
+    Events may repeat around a resubscribe; clients drop seq <= the last seen.
+    Live events can arrive out of seq order (see bids.replay); clients reorder.
+    Vendors only receive their own bids; workshops every bid on their RFQ.
+    """
+    MAX_SUBSCRIPTIONS = 100
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.rfq_ids = set()
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        for rfq_id in getattr(self, 'rfq_ids', ()):
+            await self.channel_layer.group_discard(f'rfq_{rfq_id}', self.channel_name)
+
+    async def receive_json(self, content):
+        action = content.get('action')
+        try:
+            rfq_id = int(content.get('rfq_id'))
+        except (TypeError, ValueError):
+            await self.send_json({'type': 'error', 'detail': 'rfq_id must be an integer'})
+            return
+
+        if action == 'subscribe':
+            await self.subscribe(rfq_id, parse_last_seq(content.get('last_seq')))
+        elif action == 'unsubscribe':
+            if rfq_id in self.rfq_ids:
+                self.rfq_ids.discard(rfq_id)
+                await self.channel_layer.group_discard(f'rfq_{rfq_id}', self.channel_name)
+            await self.send_json({'type': 'unsubscribed', 'rfq_id': rfq_id})
+        else:
+            await self.send_json({'type': 'error', 'detail': f'Unknown action {action!r}'})
+
+    async def subscribe(self, rfq_id, last_seq=None):
+        if rfq_id not in self.rfq_ids:
+            if len(self.rfq_ids) >= self.MAX_SUBSCRIPTIONS:
+                await self.send_json({'type': 'error', 'rfq_id': rfq_id, 'detail': 'Too many subscriptions'})
+                return
+            if not await can_watch_rfq(self.user, rfq_id):
+                await self.send_json({'type': 'error', 'rfq_id': rfq_id, 'detail': 'Not allowed'})
+                return
+            self.rfq_ids.add(rfq_id)
+            await self.channel_layer.group_add(f'rfq_{rfq_id}', self.channel_name)
+
+        # Joined the group first, so nothing falls between replay and live events
+        if last_seq is None:
+            seq = await sync_to_async(current_seq)(rfq_id)
+            await self.send_json({'type': 'subscribed', 'rfq_id': rfq_id, 'seq': seq})
+            return
+
+        events, seq = await sync_to_async(events_since)(rfq_id, last_seq)
+        await self.send_json({'type': 'subscribed', 'rfq_id': rfq_id, 'seq': seq})
+        if events is None:
+            await self.send_json({'type': 'resync_required', 'rfq_id': rfq_id, 'seq': seq})
+            return
+        for event in events:
+            await self.bids_placed(event)
 
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'bid_placed',
-            'bid': bid
-        }))
+    async def bids_placed(self, event):
+        bids = visible_bids(self.user, event['bids'])
+        if bids:
+            await self.send_json({
+                'type': 'bids_placed',
+                'rfq_id': event['rfq_id'],
+                'seq': event.get('seq'),
+                'bids': bids
+            })
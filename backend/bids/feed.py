@@ -0,0 +1,81 @@
+"""
+Materialized per-vendor RFQ feed.
+
+VendorFeedEntry rows are written when an RFQ opens for bidding (or changes
+while open) and when a vendor edits their preference, so reading a feed is a
+single indexed join instead of matching preferences on every request.
+"""
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from rfqs.models import RFQ, RFQItem
+from .models import VendorFeedEntry, VendorFeedPreference
+
+
+def _category_q(categories):
+    """Preferences that supply at least one of the requested categories."""
+    if not categories or RFQItem.Category.ANY in categories:
+        return Q()
+    q = Q(pk__in=[])
+    for category in categories:
+        field = VendorFeedPreference.CATEGORY_FIELDS.get(category)
+        if field:
+            q |= Q(**{field: True})
+    return q
+
+
+def matching_preferences(rfq):
+    """Preferences of vendors whose feed should contain `rfq`."""
+    categories = set(rfq.items.values_list('preferred_category', flat=True))
+    preferences = VendorFeedPreference.objects.filter(_category_q(categories))
+    if rfq.make:
+        preferences = preferences.filter(
+            Q(makes__isnull=True) | Q(makes__name__iexact=rfq.make)
+        )
+    return preferences.distinct()
+
+
+def matching_rfqs(preference, rfqs=None):
+    """RFQs of `rfqs` (default: the open ones) that belong in the feed of `preference.vendor`."""
+    if rfqs is None:
+        rfqs = RFQ.objects.filter(status=RFQ.Status.BIDDING_OPEN)
+
+    make_names = [name.lower() for name in preference.makes.values_list('name', flat=True)]
+    if make_names:
+        rfqs = rfqs.annotate(make_lower=Lower('make')).filter(
+            Q(make='') | Q(make_lower__in=make_names)
+        )
+
+    supplied = [
+        category for category, field in VendorFeedPreference.CATEGORY_FIELDS.items()
+        if getattr(preference, field)
+    ]
+    # RFQs with no items yet match any vendor, like _category_q does
+    wanted = RFQItem.objects.filter(
+        Q(preferred_category=RFQItem.Category.ANY) | Q(preferred_category__in=supplied)
+    ).values('rfq_id')
+    rfqs = rfqs.filter(Q(id__in=wanted) | Q(items__isnull=True))
+    return rfqs.distinct()
+
+
+def index_rfq(rfq):
+    """(Re)write the feed entries for one RFQ; clears them once it is not open."""
+    VendorFeedEntry.objects.filter(rfq=rfq).delete()
+    if rfq.status != RFQ.Status.BIDDING_OPEN:
+        return
+    vendor_ids = matching_preferences(rfq).values_list('vendor_id', flat=True)
+    VendorFeedEntry.objects.bulk_create(
+        [VendorFeedEntry(vendor_id=vendor_id, rfq=rfq) for vendor_id in vendor_ids],
+        ignore_conflicts=True,
+    )
+
+
+def rebuild_vendor_feed(preference):
+    """Rewrite one vendor's feed after their preference changed."""
+    VendorFeedEntry.objects.filter(vendor_id=preference.vendor_id).delete()
+    rfq_ids = matching_rfqs(preference).values_list('id', flat=True)
+    VendorFeedEntry.objects.bulk_create(
+        [VendorFeedEntry(vendor_id=preference.vendor_id, rfq_id=rfq_id) for rfq_id in rfq_ids],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
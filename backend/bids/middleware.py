@@ -0,0 +1,39 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+
+
+@database_sync_to_async
+def get_token_user(key):
+    from rest_framework.authtoken.models import Token
+    try:
+        token = Token.objects.select_related('user').get(key=key)
+    except Token.DoesNotExist:
+        return None
+    return token.user if token.user.is_active else None
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates WebSocket connections with the DRF token the apps already
+    use for HTTP: `?token=<key>` or an `Authorization: Token <key>` header.
+    Connections without a token fall through to session auth.
+    """
+
+    async def __call__(self, scope, receive, send):
+        key = self.get_token(scope)
+        if key:
+            user = await get_token_user(key)
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
+
+    def get_token(self, scope):
+        for name, value in scope.get('headers', []):
+            if name == b'authorization':
+                keyword, _, key = value.decode().partition(' ')
+                if keyword.lower() == 'token' and key:
+                    return key.strip()
+        query = parse_qs(scope.get('query_string', b'').decode())
+        return query.get('token', [None])[0]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0002_bid_availability_bid_eta'),
+        ('rfqs', '0011_rfq_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorFeedPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('oem', models.BooleanField(default=True)),
+                ('aftermarket_branded', models.BooleanField(default=True)),
+                ('aftermarket_unbranded', models.BooleanField(default=True)),
+                ('used', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('makes', models.ManyToManyField(blank=True, help_text='Makes stocked; empty = all makes', related_name='+', to='rfqs.vehiclemake')),
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='feed_preference', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VendorFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rfq', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='rfqs.rfq')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Vendor feed entries',
+                'unique_together': {('vendor', 'rfq')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0003_vendor_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['vendor', 'rfq_item'], name='bids_bid_vendor__55a5bd_idx'),
+        ),
+    ]
@@ -27,5 +27,47 @@ class Bid(models.Model):
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # "RFQs I bid on" for vendors, answered from the index alone
+            models.Index(fields=['vendor', 'rfq_item']),
+        ]
+
     def __str__(self):
         return f"{self.vendor} - {self.amount}"
+
+class VendorFeedPreference(models.Model):
+    """
+    What a vendor stocks. Vendors with a preference get a filtered feed read
+    from VendorFeedEntry; vendors without one keep the global open-RFQ feed.
+    """
+    vendor = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_preference')
+    makes = models.ManyToManyField('rfqs.VehicleMake', blank=True, related_name='+', help_text="Makes stocked; empty = all makes")
+
+    # Supply categories (Bid.Category); an RFQ item asking for ANY matches every vendor
+    oem = models.BooleanField(default=True)
+    aftermarket_branded = models.BooleanField(default=True)
+    aftermarket_unbranded = models.BooleanField(default=True)
+    used = models.BooleanField(default=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    CATEGORY_FIELDS = {
+        Bid.Category.OEM: 'oem',
+        Bid.Category.AFTERMARKET_BRANDED: 'aftermarket_branded',
+        Bid.Category.AFTERMARKET_UNBRANDED: 'aftermarket_unbranded',
+        Bid.Category.USED: 'used',
+    }
+
+    def __str__(self):
+        return f"Feed preference for {self.vendor}"
+
+class VendorFeedEntry(models.Model):
+    """Precomputed (vendor, RFQ) pair: the RFQ matches the vendor's preference."""
+    vendor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_entries')
+    rfq = models.ForeignKey('rfqs.RFQ', on_delete=models.CASCADE, related_name='feed_entries')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['vendor', 'rfq']
+        verbose_name_plural = "Vendor feed entries"
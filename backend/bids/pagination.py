@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+class FeedCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the vendor feed, newest first.
+    The cursor encodes the last (updated_at, id) position, so each page is an
+    index range scan regardless of how deep the client has scrolled.
+    """
+    ordering = ('-updated_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
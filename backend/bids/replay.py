@@ -0,0 +1,68 @@
+"""
+Per-RFQ sequence numbers and a bounded replay buffer for bid events.
+
+Every group message from bids.broadcast gets the next sequence number for its
+RFQ and is kept in the cache for a while. A client that reconnects with the
+last sequence it saw receives just the events it missed; if the gap is larger
+than the buffer (or the events expired) it is told to resync instead.
+Sequence numbers and events live in the shared cache so every worker agrees
+on them.
+
+Ordering: one worker sends its events in seq order (a single broadcaster
+thread), but events for the same RFQ sent by two workers can reach a client
+out of order. Clients order frames by seq; on a gap they wait briefly for the
+missing seq and otherwise resubscribe with last_seq to have it replayed.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+def replay_size():
+    # Read per call: config/asgi.py imports this module before settings are configured
+    return getattr(settings, 'BID_REPLAY_SIZE', 200)
+
+
+def replay_ttl():
+    return getattr(settings, 'BID_REPLAY_TTL', 60 * 60)
+
+
+def _seq_key(rfq_id):
+    return f'bids:seq:{rfq_id}'
+
+
+def _event_key(rfq_id, seq):
+    return f'bids:event:{rfq_id}:{seq}'
+
+
+def record_event(rfq_id, event):
+    """Stamp `event` with the RFQ's next sequence number and buffer it."""
+    key = _seq_key(rfq_id)
+    cache.add(key, 0, timeout=None)
+    seq = cache.incr(key)
+    event['seq'] = seq
+    cache.set(_event_key(rfq_id, seq), event, timeout=replay_ttl())
+    # Keep the buffer bounded even if events arrive faster than they expire
+    cache.delete(_event_key(rfq_id, seq - replay_size()))
+    return seq
+
+
+def current_seq(rfq_id):
+    return cache.get(_seq_key(rfq_id), 0)
+
+
+def events_since(rfq_id, last_seq):
+    """
+    Return (events after last_seq in order, current seq).
+    events is None when the gap can't be replayed and the client must resync.
+    """
+    seq = current_seq(rfq_id)
+    if last_seq >= seq:
+        return [], seq
+    if seq - last_seq > replay_size():
+        return None, seq
+
+    keys = [_event_key(rfq_id, n) for n in range(last_seq + 1, seq + 1)]
+    found = cache.get_many(keys)
+    if len(found) != len(keys):
+        return None, seq
+    return [found[key] for key in keys], seq
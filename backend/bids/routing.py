@@ -4,4 +4,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/rfqs/(?P<rfq_id>\d+)/$', consumers.BidConsumer.as_asgi()),
+    re_path(r'ws/bids/$', consumers.BidStreamConsumer.as_asgi()),
 ]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Bid
+from .models import Bid, VendorFeedPreference
 from rfqs.serializers import RFQReadSerializer
 
 class BidSerializer(serializers.ModelSerializer):
@@ -11,10 +11,21 @@ class BidSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Bid
-        fields = ['id', 'rfq_item', 'item_name', 'item_quantity', 'vendor_name', 'vendor_shop_name', 'vendor_rating', 'amount', 'part_category', 'brand', 'availability', 'eta', 'remarks', 'status', 'created_at']
-        read_only_fields = ['id', 'vendor_name', 'status', 'created_at']
+        fields = ['id', 'rfq_item', 'item_name', 'item_quantity', 'vendor', 'vendor_name', 'vendor_shop_name', 'vendor_rating', 'amount', 'part_category', 'brand', 'availability', 'eta', 'remarks', 'status', 'created_at']
+        read_only_fields = ['id', 'vendor', 'vendor_name', 'status', 'created_at']
 
     def validate_amount(self, value):
         if value <= 0:
             raise serializers.ValidationError("Bid amount must be positive.")
         return value
+
+class BulkBidSerializer(serializers.Serializer):
+    """Request body of BidViewSet.bulk: one RFQ and a non-empty list of bids on its items."""
+    rfq = serializers.IntegerField()
+    bids = BidSerializer(many=True, allow_empty=False)
+
+class VendorFeedPreferenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VendorFeedPreference
+        fields = ['makes', 'oem', 'aftermarket_branded', 'aftermarket_unbranded', 'used', 'updated_at']
+        read_only_fields = ['updated_at']
@@ -1,23 +1,38 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from .models import Bid
-from .serializers import BidSerializer
+from .broadcast import broadcaster
+from rfqs.cs import invalidate_cs
+from rfqs.counters import bid_created, bid_status_changed, refresh_counters
+
+@receiver(post_init, sender=Bid)
+def remember_bid_state(sender, instance, **kwargs):
+    # What the counters last saw; __dict__ so deferred fields aren't loaded
+    instance._counted_status = instance.__dict__.get('status')
+    instance._counted_amount = instance.__dict__.get('amount')
 
 @receiver(post_save, sender=Bid)
 def bid_saved(sender, instance, created, **kwargs):
+    rfq_id = instance.rfq_item.rfq_id
+    invalidate_cs(rfq_id)
+
+    if created:
+        bid_created(instance)
+    elif instance.amount != instance._counted_amount:
+        refresh_counters([instance.rfq_item_id])
+    elif instance.status != instance._counted_status:
+        bid_status_changed(instance, instance._counted_status)
+    instance._counted_status = instance.status
+    instance._counted_amount = instance.amount
+
     if created:
-        channel_layer = get_channel_layer()
-        group_name = f'rfq_{instance.rfq_item.rfq.id}'
-        
-        # Serialize the bid
-        serializer = BidSerializer(instance)
-        
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': 'bid_placed',
-                'bid': serializer.data
-            }
-        )
+        bid_id = instance.pk
+
+        # Broadcast off the request thread, and only once the bid is visible to other connections
+        transaction.on_commit(lambda: broadcaster.enqueue(rfq_id, [bid_id]))
+
+@receiver(post_delete, sender=Bid)
+def bid_deleted(sender, instance, **kwargs):
+    invalidate_cs(instance.rfq_item.rfq_id)
+    refresh_counters([instance.rfq_item_id])
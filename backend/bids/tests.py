@@ -1,3 +1,461 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import socket
+import threading
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import channel_layers, get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import User
+from rfqs.models import RFQ, RFQItem
+from .broadcast import BidBroadcaster, broadcaster
+from .feed import index_rfq
+from .models import Bid, VendorFeedPreference
+from .replay import events_since, record_event
+from .views import RFQFeedView
+
+try:
+    from fakeredis import TcpFakeServer
+    import channels_redis  # noqa: F401
+    import lupa  # noqa: F401  (fakeredis needs it for the EVAL scripts channels_redis runs)
+except ImportError:
+    TcpFakeServer = None
+
+
+class LocalRedisServer:
+    """
+    In-process Redis stand-in (fakeredis) listening on a free localhost port,
+    so the Redis channel layers can be exercised without a real server.
+    Requires: pip install fakeredis lupa
+    """
+
+    def __enter__(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        self.url = f'redis://127.0.0.1:{port}/0'
+        self.server = TcpFakeServer(('127.0.0.1', port), server_type='redis')
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def layer_settings(backend, url):
+    return {'default': {'BACKEND': backend, 'CONFIG': {'hosts': [url], 'prefix': 'test'}}}
+
+
+def make_layer(backend, url):
+    """A fresh layer instance, as a separate Daphne worker would build it."""
+    config = layer_settings(backend, url)['default']
+    return import_string(config['BACKEND'])(**config['CONFIG'])
+
+
+@unittest.skipUnless(TcpFakeServer, 'fakeredis, lupa and channels_redis are required')
+class RedisChannelLayerTests(TestCase):
+    """Bid broadcasts must cross process boundaries through the Redis layers."""
+
+    BACKENDS = [
+        'channels_redis.core.RedisChannelLayer',
+        'channels_redis.pubsub.RedisPubSubChannelLayer',
+    ]
+
+    def setUp(self):
+        self.redis = LocalRedisServer().__enter__()
+        self.addCleanup(self.redis.__exit__)
+        self.addCleanup(channel_layers.backends.clear)
+
+    @async_to_sync
+    async def broadcast_and_receive(self, backend, group, send):
+        """Join `group` on a separate layer instance, run `send`, return what arrives."""
+        layer = make_layer(backend, self.redis.url)
+        channel = await layer.new_channel()
+        await layer.group_add(group, channel)
+        try:
+            await send()
+            return await asyncio.wait_for(layer.receive(channel), timeout=5)
+        finally:
+            await layer.group_discard(group, channel)
+
+    def test_group_send_reaches_other_worker(self):
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                sender = make_layer(backend, self.redis.url)
+
+                async def send():
+                    await sender.group_send('rfq_1', {'type': 'bid_placed', 'bid': {'id': 1}})
+
+                message = self.broadcast_and_receive(backend, 'rfq_1', send)
+                self.assertEqual(message['bid'], {'id': 1})
+
+    def test_broadcaster_sends_from_its_thread(self):
+        sent = []
+        done = threading.Event()
+
+        def send(batch):
+            sent.append((batch, threading.current_thread().name))
+            done.set()
+
+        with override_settings(CHANNEL_LAYERS=layer_settings(self.BACKENDS[0], self.redis.url),
+                               BID_BROADCAST_ASYNC=True), \
+                patch('bids.broadcast.BidBroadcaster.send', side_effect=send):
+            channel_layers.backends.clear()
+            BidBroadcaster().enqueue(1, [2])
+            self.assertTrue(done.wait(5))
+        self.assertEqual(sent, [({1: [2]}, 'bid-broadcaster')])
+
+    def test_bid_signal_broadcasts_through_configured_layer(self):
+        workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        vendor = User.objects.create(username='vendor', role=User.Role.VENDOR)
+        rfq = RFQ.objects.create(workshop=workshop, status=RFQ.Status.BIDDING_OPEN)
+        item = RFQItem.objects.create(rfq=rfq, name='Brake pad')
+
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend), override_settings(
+                CHANNEL_LAYERS=layer_settings(backend, self.redis.url),
+                BID_BROADCAST_ASYNC=False,
+            ):
+                channel_layers.backends.clear()
+                created = []
+
+                @sync_to_async
+                def place_bid():
+                    with self.captureOnCommitCallbacks(execute=True):
+                        created.append(Bid.objects.create(
+                            rfq_item=item, vendor=vendor, amount=Decimal('1200'),
+                            part_category=Bid.Category.OEM
+                        ))
+
+                message = self.broadcast_and_receive(backend, f'rfq_{rfq.id}', place_bid)
+                self.assertEqual(message['type'], 'bids_placed')
+                self.assertEqual([bid['id'] for bid in message['bids']], [created[0].id])
+
+
+@override_settings(BID_BROADCAST_ASYNC=True)
+class InMemoryBroadcastTests(TestCase):
+    """The in-memory layer belongs to the server's event loop, so it is never sent to from the broadcast thread."""
+
+    def setUp(self):
+        self.addCleanup(channel_layers.backends.clear)
+
+    def test_in_memory_layer_sends_inline(self):
+        broadcaster = BidBroadcaster()
+        with patch('bids.broadcast.BidBroadcaster.send') as send:
+            broadcaster.enqueue(1, [2])
+        send.assert_called_once_with({1: [2]})
+        self.assertIsNone(broadcaster._thread)
+
+
+@override_settings(BID_BROADCAST_ASYNC=False)
+class BulkBidTests(TestCase):
+    """A vendor quotes a whole RFQ in one request and watchers get one event."""
+
+    def setUp(self):
+        self.workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        self.vendor = User.objects.create(username='vendor', role=User.Role.VENDOR)
+        self.rfq = RFQ.objects.create(workshop=self.workshop, status=RFQ.Status.BIDDING_OPEN)
+        self.items = [RFQItem.objects.create(rfq=self.rfq, name=f'Part {i}') for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.vendor)
+
+    def post(self, bids, rfq=None):
+        return self.client.post('/api/v1/bids/bulk/', {'rfq': (rfq or self.rfq).id, 'bids': bids}, format='json')
+
+    def bid(self, item, amount='100'):
+        return {'rfq_item': item.id, 'amount': amount, 'part_category': Bid.Category.OEM}
+
+    def test_bulk_create_broadcasts_once(self):
+        sent = []
+        with patch('bids.broadcast.BidBroadcaster.send', side_effect=sent.append), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.post([self.bid(item, amount) for item, amount in zip(self.items, ['100', '80', '90'])])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sent, [{self.rfq.id: [bid['id'] for bid in response.data]}])
+
+        self.rfq.refresh_from_db()
+        self.assertEqual((self.rfq.bid_count, self.rfq.vendor_count), (3, 1))
+        self.assertEqual(RFQItem.objects.get(pk=self.items[1].pk).min_amount, Decimal('80'))
+
+    def test_batch_is_validated_as_a_whole(self):
+        other = RFQ.objects.create(workshop=self.workshop, status=RFQ.Status.BIDDING_OPEN)
+        other_item = RFQItem.objects.create(rfq=other, name='Other')
+
+        self.assertEqual(self.post([self.bid(self.items[0]), self.bid(self.items[1], '-5')]).status_code, 400)
+        self.assertEqual(self.post([self.bid(self.items[0]), self.bid(self.items[0])]).status_code, 400)
+        self.assertEqual(self.post([self.bid(self.items[0]), self.bid(other_item)]).status_code, 400)
+        RFQ.objects.filter(pk=self.rfq.pk).update(status=RFQ.Status.COMPLETED)
+        self.assertEqual(self.post([self.bid(self.items[0])]).status_code, 400)
+        self.assertFalse(Bid.objects.exists())
+
+    def test_malformed_payloads_are_rejected(self):
+        url = '/api/v1/bids/bulk/'
+        self.assertEqual(self.client.post(url, {'rfq': 'abc', 'bids': [self.bid(self.items[0])]}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(url, [self.bid(self.items[0])], format='json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'rfq': self.rfq.id, 'bids': {}}, format='json').status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.client.post(url, {'rfq': self.rfq.id + 1000, 'bids': []}, format='json').status_code, 400)
+        self.assertFalse(Bid.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch(self):
+        other = RFQ.objects.create(workshop=self.workshop, status=RFQ.Status.BIDDING_OPEN)
+        other_item = RFQItem.objects.create(rfq=other, name='Other')
+        with CaptureQueriesContext(connection) as one:
+            self.assertEqual(self.post([self.bid(other_item)], rfq=other).status_code, 201)
+        with CaptureQueriesContext(connection) as three:
+            self.assertEqual(self.post([self.bid(item) for item in self.items]).status_code, 201)
+        # Item lookups during validation are per item; nothing else (e.g. serializing) may be
+        self.assertEqual(len(three) - len(one), 2)
+
+
+class BidSocketTests(TestCase):
+    """Both bid sockets authenticate by token, authorize per RFQ and filter bids by role."""
+
+    def setUp(self):
+        self.workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        self.other_workshop = User.objects.create(username='other-workshop', role=User.Role.WORKSHOP)
+        self.vendor = User.objects.create(username='vendor', role=User.Role.VENDOR)
+        self.competitor = User.objects.create(username='competitor', role=User.Role.VENDOR)
+        self.rfq = RFQ.objects.create(workshop=self.workshop, status=RFQ.Status.BIDDING_OPEN)
+        self.tokens = {user.id: Token.objects.create(user=user).key
+                       for user in (self.workshop, self.other_workshop, self.vendor)}
+        self.addCleanup(channel_layers.backends.clear)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def communicator(self, path, user=None):
+        from config.asgi import application
+        if user is not None:
+            path = f'{path}?token={self.tokens[user.id]}'
+        return WebsocketCommunicator(application, path)
+
+    def event(self):
+        return {'type': 'bids_placed', 'rfq_id': self.rfq.id, 'seq': 1, 'bids': [
+            {'id': 1, 'vendor': self.vendor.id}, {'id': 2, 'vendor': self.competitor.id},
+        ]}
+
+    @async_to_sync
+    async def legacy_frames(self, user):
+        """Connect to ws/rfqs/<id>/ as `user`; the close code if refused, else the bids received."""
+        communicator = self.communicator(f'/ws/rfqs/{self.rfq.id}/', user)
+        connected, code = await communicator.connect()
+        if not connected:
+            return code
+        await get_channel_layer().group_send(f'rfq_{self.rfq.id}', self.event())
+        bids = []
+        while not await communicator.receive_nothing(timeout=0.2):
+            bids.append((await communicator.receive_json_from())['bid']['id'])
+        await communicator.disconnect()
+        return bids
+
+    def test_legacy_socket(self):
+        self.assertEqual(self.legacy_frames(None), 4401)
+        self.assertEqual(self.legacy_frames(self.other_workshop), 4403)
+        self.assertEqual(self.legacy_frames(self.vendor), [1])
+        self.assertEqual(self.legacy_frames(self.workshop), [1, 2])
+
+    @async_to_sync
+    async def stream_session(self, user):
+        communicator = self.communicator('/ws/bids/', user)
+        connected, code = await communicator.connect()
+        if not connected:
+            return code
+        replies = []
+        for rfq_id in (self.rfq.id, self.rfq.id + 1000):
+            await communicator.send_json_to({'action': 'subscribe', 'rfq_id': rfq_id})
+            replies.append((await communicator.receive_json_from())['type'])
+        await get_channel_layer().group_send(f'rfq_{self.rfq.id}', self.event())
+        bids = [bid['id'] for bid in (await communicator.receive_json_from())['bids']]
+        await communicator.disconnect()
+        return replies, bids
+
+    def test_stream_socket(self):
+        self.assertEqual(self.stream_session(None), 4401)
+        self.assertEqual(self.stream_session(self.vendor), (['subscribed', 'error'], [1]))
+        self.assertEqual(self.stream_session(self.workshop), (['subscribed', 'error'], [1, 2]))
+
+
+    def record(self, count):
+        """Buffer `count` events for the RFQ, one bid each, as bids.broadcast does."""
+        return [record_event(self.rfq.id, {'type': 'bids_placed', 'rfq_id': self.rfq.id, 'bids': [
+            {'id': n, 'vendor': self.vendor.id}]}) for n in range(1, count + 1)]
+
+    def test_record_event_sequences_and_buffers(self):
+        self.assertEqual(self.record(3), [1, 2, 3])
+        events, seq = events_since(self.rfq.id, 1)
+        self.assertEqual(([event['seq'] for event in events], seq), ([2, 3], 3))
+        self.assertEqual(events_since(self.rfq.id, 3), ([], 3))
+        with override_settings(BID_REPLAY_SIZE=2):
+            self.assertEqual(events_since(self.rfq.id, 0), (None, 3))
+            self.assertEqual(self.record(1), [4])
+            # Fell out of the bounded buffer
+            self.assertEqual(events_since(self.rfq.id, 1), (None, 4))
+
+    def test_broadcasts_carry_increasing_seq(self):
+        bid = Bid.objects.create(rfq_item=RFQItem.objects.create(rfq=self.rfq, name='Brake pad'),
+                                 vendor=self.vendor, amount=Decimal('100'), part_category=Bid.Category.OEM)
+
+        @async_to_sync
+        async def session():
+            communicator = self.communicator('/ws/bids/', self.workshop)
+            await communicator.connect()
+            await communicator.send_json_to({'action': 'subscribe', 'rfq_id': self.rfq.id})
+            subscribed = await communicator.receive_json_from()
+            for _ in range(2):
+                await sync_to_async(broadcaster.send)({self.rfq.id: [bid.id]})
+            seqs = [(await communicator.receive_json_from())['seq'] for _ in range(2)]
+            await communicator.disconnect()
+            return subscribed['seq'], seqs
+
+        self.assertEqual(session(), (0, [1, 2]))
+
+    @async_to_sync
+    async def legacy_replay(self, last_seq):
+        communicator = self.communicator(f'/ws/rfqs/{self.rfq.id}/', self.workshop)
+        communicator.scope['query_string'] += f'&last_seq={last_seq}'.encode()
+        await communicator.connect()
+        frames = []
+        while not await communicator.receive_nothing(timeout=0.2):
+            frames.append(await communicator.receive_json_from())
+        await communicator.disconnect()
+        return frames
+
+    @async_to_sync
+    async def stream_replay(self, last_seq):
+        communicator = self.communicator('/ws/bids/', self.workshop)
+        await communicator.connect()
+        await communicator.send_json_to({'action': 'subscribe', 'rfq_id': self.rfq.id, 'last_seq': last_seq})
+        frames = []
+        while not await communicator.receive_nothing(timeout=0.2):
+            frames.append(await communicator.receive_json_from())
+        await communicator.disconnect()
+        return frames
+
+    def test_resume_from_last_seq(self):
+        self.record(3)
+        self.assertEqual([(frame['seq'], frame['bid']['id']) for frame in self.legacy_replay(1)], [(2, 2), (3, 3)])
+        self.assertEqual(self.legacy_replay(3), [])
+
+        subscribed, *events = self.stream_replay(1)
+        self.assertEqual((subscribed['type'], subscribed['seq']), ('subscribed', 3))
+        self.assertEqual([(event['type'], event['seq']) for event in events], [('bids_placed', 2), ('bids_placed', 3)])
+
+    def test_resync_when_buffer_lost_the_gap(self):
+        self.record(3)
+        with override_settings(BID_REPLAY_SIZE=1):
+            self.assertEqual(self.legacy_replay(0), [{'type': 'resync_required', 'seq': 3}])
+            self.assertEqual([frame['type'] for frame in self.stream_replay(0)], ['subscribed', 'resync_required'])
+        # Expired events also force a resync, even inside the size bound
+        cache.delete(f'bids:event:{self.rfq.id}:2')
+        self.assertEqual([frame['type'] for frame in self.stream_replay(1)], ['subscribed', 'resync_required'])
+
+
+class VendorFeedTests(TestCase):
+    """The feed index follows vendor preferences and item edits."""
+
+    def setUp(self):
+        self.workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        self.vendor = User.objects.create(username='vendor', role=User.Role.VENDOR)
+        self.rfq = RFQ.objects.create(workshop=self.workshop, status=RFQ.Status.BIDDING_OPEN)
+        self.item = RFQItem.objects.create(rfq=self.rfq, name='Part', preferred_category=RFQItem.Category.USED)
+        index_rfq(self.rfq)
+        self.client = APIClient()
+        self.client.force_authenticate(self.vendor)
+
+    def feed_ids(self):
+        return [rfq['id'] for rfq in self.client.get('/api/v1/feed/').data['results']]
+
+    def test_preferences_rebuild_the_feed(self):
+        # No preference yet: everything open
+        self.assertEqual(self.client.get('/api/v1/feed/preferences/').data['used'], True)
+        self.assertEqual(self.feed_ids(), [self.rfq.id])
+
+        response = self.client.patch('/api/v1/feed/preferences/', {'used': False}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.feed_ids(), [])
+        self.client.patch('/api/v1/feed/preferences/', {'used': True}, format='json')
+        self.assertEqual(self.feed_ids(), [self.rfq.id])
+
+        self.client.force_authenticate(self.workshop)
+        self.assertEqual(self.client.get('/api/v1/feed/preferences/').status_code, 403)
+
+    def test_item_edits_reindex_the_rfq(self):
+        self.client.patch('/api/v1/feed/preferences/', {'used': False}, format='json')
+        self.assertEqual(self.feed_ids(), [])
+
+        workshop = APIClient()
+        workshop.force_authenticate(self.workshop)
+        response = workshop.patch(f'/api/v1/rfq-items/{self.item.id}/',
+                                  {'preferred_category': RFQItem.Category.OEM}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.feed_ids(), [self.rfq.id])
+
+        # Moving the OEM item takes the RFQ out of the feed and puts the other one in
+        RFQItem.objects.create(rfq=self.rfq, name='Other', preferred_category=RFQItem.Category.USED)
+        other = RFQ.objects.create(workshop=self.workshop, status=RFQ.Status.BIDDING_OPEN)
+        RFQItem.objects.create(rfq=other, name='Other', preferred_category=RFQItem.Category.USED)
+        index_rfq(other)
+        workshop.patch(f'/api/v1/rfq-items/{self.item.id}/', {'rfq': other.id}, format='json')
+        self.assertEqual(self.feed_ids(), [other.id])
+
+
+class FeedDeltaTests(TestCase):
+    """Delta sync returns only this vendor's changes, in bounded pages, overlapping by a margin."""
+
+    def setUp(self):
+        self.workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        self.vendor = User.objects.create(username='vendor', role=User.Role.VENDOR)
+        VendorFeedPreference.objects.create(vendor=self.vendor, aftermarket_branded=False,
+                                            aftermarket_unbranded=False, used=False)
+        self.client = APIClient()
+        self.client.force_authenticate(self.vendor)
+
+    def rfq(self, category, status=RFQ.Status.BIDDING_OPEN):
+        rfq = RFQ.objects.create(workshop=self.workshop, status=status)
+        RFQItem.objects.create(rfq=rfq, name='Part', preferred_category=category)
+        index_rfq(rfq)
+        return rfq
+
+    def delta(self, since, since_id=None):
+        params = {'updated_since': since.isoformat()}
+        if since_id:
+            params['since_id'] = since_id
+        return self.client.get('/api/v1/feed/', params).data
+
+    def test_delta_is_scoped_and_paginated(self):
+        oem, used = RFQItem.Category.OEM, RFQItem.Category.USED
+        wanted = self.rfq(oem)
+        self.rfq(used)
+        closed = self.rfq(oem, RFQ.Status.COMPLETED)
+        self.rfq(used, RFQ.Status.CANCELLED)
+        self.rfq(oem, RFQ.Status.DRAFT)
+
+        since = timezone.now() - datetime.timedelta(days=1)
+        data = self.delta(since)
+        self.assertEqual([rfq['id'] for rfq in data['results']], [wanted.id])
+        self.assertEqual(data['closed_ids'], [closed.id])
+        self.assertFalse(data['has_more'])
+        self.assertLessEqual(data['server_time'], timezone.now() - RFQFeedView.DELTA_MARGIN)
+
+        seen, since_id = [], None
+        with patch.object(RFQFeedView, 'DELTA_LIMIT', 1):
+            while True:
+                data = self.delta(since, since_id)
+                seen += [rfq['id'] for rfq in data['results']] + data['closed_ids']
+                if not data['has_more']:
+                    break
+                since, since_id = data['server_time'], data['since_id']
+        self.assertEqual(seen, [wanted.id, closed.id])
@@ -1,9 +1,17 @@
-from rest_framework import viewsets, permissions, views, generics
+import datetime
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import viewsets, permissions, views, generics, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
-from .models import Bid
+from .models import Bid, VendorFeedPreference
 from rfqs.models import RFQ
-from .serializers import BidSerializer
+from .serializers import BidSerializer, BulkBidSerializer, VendorFeedPreferenceSerializer
 from rfqs.serializers import RFQReadSerializer
+from .pagination import FeedCursorPagination
 
 class BidViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -29,10 +37,155 @@ class BidViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(vendor=self.request.user)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Quote several items of one RFQ in a single request:
+        { "rfq": 1, "bids": [{"rfq_item": 3, "amount": "1200", "part_category": "GENUINE_OEM", ...}, ...] }
+        All bids are validated together and inserted in one transaction; watchers get one event.
+        """
+        if request.user.role != 'VENDOR':
+            return Response({'error': 'Only vendors can bid'}, status=status.HTTP_403_FORBIDDEN)
+
+        payload = BulkBidSerializer(data=request.data, context={'request': request})
+        payload.is_valid(raise_exception=True)
+        rfq_id = payload.validated_data['rfq']
+        bids_data = payload.validated_data['bids']
+
+        item_ids = [data['rfq_item'].id for data in bids_data]
+        if any(data['rfq_item'].rfq_id != rfq_id for data in bids_data):
+            return Response({'error': 'All bids must be for items of this RFQ'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(set(item_ids)) != len(item_ids):
+            return Response({'error': 'Only one bid per item'}, status=status.HTTP_400_BAD_REQUEST)
+
+        from rfqs.counters import refresh_counters
+        from rfqs.cs import invalidate_cs
+        from .broadcast import broadcaster
+
+        with transaction.atomic():
+            # Locked so the RFQ can't close between the check and the insert
+            # (RFQ before its items, as in rfqs.counters)
+            rfq = RFQ.objects.select_for_update().filter(pk=rfq_id).first()
+            if rfq is None:
+                return Response({'error': 'RFQ not found'}, status=status.HTTP_400_BAD_REQUEST)
+            if rfq.status != RFQ.Status.BIDDING_OPEN:
+                return Response({'error': 'RFQ is not open for bidding'}, status=status.HTTP_400_BAD_REQUEST)
+
+            bids = Bid.objects.bulk_create([
+                Bid(vendor=request.user, **data) for data in bids_data
+            ])
+            # bulk_create skips the bid_saved signal: do its work once for the whole batch
+            refresh_counters(item_ids)
+            invalidate_cs(rfq.id)
+            bid_ids = [bid.id for bid in bids]
+            transaction.on_commit(lambda: broadcaster.enqueue(rfq.id, bid_ids))
+
+        # vendor and rfq_item are the already-loaded request user and validated
+        # items, so serializing the batch costs no further queries
+        return Response(BidSerializer(bids, many=True).data, status=status.HTTP_201_CREATED)
+
 class RFQFeedView(generics.ListAPIView):
+    """
+    Vendor feed of open RFQs.
+    Vendors with a feed preference only see RFQs indexed for them (see bids.feed).
+
+    Default mode is cursor-paginated (?cursor=, ?page_size=).
+    Delta mode (?updated_since=<ISO datetime>[&since_id=<id>]) returns RFQs in
+    this vendor's feed changed since then: open ones in `results`, ones no
+    longer open in `closed_ids`, at most DELTA_LIMIT per response. Clients pass
+    back `server_time` (and `since_id` when given) as the next cursor and keep
+    calling while `has_more` is true. Responses overlap by DELTA_MARGIN, so
+    clients upsert by id.
+    """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = RFQReadSerializer
+    pagination_class = FeedCursorPagination
+    DELTA_LIMIT = 100
+    # updated_at is set before commit: a slower transaction can land with an
+    # updated_at earlier than a sync that ran meanwhile. Syncs restart this far
+    # back so such rows are still picked up.
+    DELTA_MARGIN = datetime.timedelta(seconds=60)
 
     def get_queryset(self):
-        # Vendors see all Open RFQs
-        return RFQ.objects.filter(status=RFQ.Status.BIDDING_OPEN).order_by('-updated_at')
+        # Vendors see all Open RFQs, or their precomputed slice of them
+        queryset = self.filter_for_vendor(
+            RFQ.objects.filter(status=RFQ.Status.BIDDING_OPEN).order_by('-updated_at', '-id')
+        )
+        return RFQReadSerializer.setup_eager_loading(queryset, self.request.user)
+
+    def filter_for_vendor(self, queryset):
+        user = self.request.user
+        if VendorFeedPreference.objects.filter(vendor=user).exists():
+            queryset = queryset.filter(feed_entries__vendor=user)
+        return queryset
+
+    def closed_for_vendor(self, queryset):
+        """RFQs no longer open that were in this vendor's feed while they were."""
+        from .feed import matching_rfqs
+        queryset = queryset.exclude(status__in=[RFQ.Status.BIDDING_OPEN, RFQ.Status.DRAFT])
+        preference = VendorFeedPreference.objects.filter(vendor=self.request.user).first()
+        if preference:
+            # Feed entries are dropped on close, so match the preference itself
+            queryset = queryset.filter(id__in=matching_rfqs(preference, queryset).values('id'))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        updated_since = request.query_params.get('updated_since')
+        if updated_since is None:
+            return super().list(request, *args, **kwargs)
+
+        since = parse_datetime(updated_since)
+        if since is None:
+            return Response({'error': 'updated_since must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, datetime.timezone.utc)
+        try:
+            since_id = int(request.query_params.get('since_id') or 0)
+        except ValueError:
+            return Response({'error': 'since_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        server_time = timezone.now() - self.DELTA_MARGIN
+        # Keyset on (updated_at, id) so a page boundary inside one timestamp loses nothing
+        changed = RFQ.objects.filter(Q(updated_at__gt=since) | Q(updated_at=since, id__gt=since_id))
+        page = list(
+            self.filter_for_vendor(changed.filter(status=RFQ.Status.BIDDING_OPEN))
+            .order_by().values('id', 'updated_at', 'status')
+            .union(self.closed_for_vendor(changed).order_by().values('id', 'updated_at', 'status'))
+            .order_by('updated_at', 'id')[:self.DELTA_LIMIT + 1]
+        )
+        has_more = len(page) > self.DELTA_LIMIT
+        page = page[:self.DELTA_LIMIT]
+
+        open_ids = [row['id'] for row in page if row['status'] == RFQ.Status.BIDDING_OPEN]
+        opened = RFQReadSerializer.setup_eager_loading(
+            RFQ.objects.filter(id__in=open_ids).order_by('updated_at', 'id'), request.user
+        )
+        payload = {
+            'server_time': page[-1]['updated_at'] if has_more else server_time,
+            'has_more': has_more,
+            'results': self.get_serializer(opened, many=True).data,
+            'closed_ids': [row['id'] for row in page if row['status'] != RFQ.Status.BIDDING_OPEN],
+        }
+        if has_more:
+            payload['since_id'] = page[-1]['id']
+        return Response(payload)
+
+class VendorFeedPreferenceView(generics.RetrieveUpdateAPIView):
+    """
+    The requesting vendor's feed preference.
+    Saving it switches the vendor to a filtered feed and rebuilds their feed index.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = VendorFeedPreferenceSerializer
+
+    def get_object(self):
+        user = self.request.user
+        if user.role != 'VENDOR':
+            raise PermissionDenied('Only vendors have feed preferences.')
+        # Unsaved default (everything) until the vendor first saves one
+        return VendorFeedPreference.objects.filter(vendor=user).first() or VendorFeedPreference(vendor=user)
+
+    def perform_update(self, serializer):
+        from .feed import rebuild_vendor_feed
+        preference = serializer.save()
+        rebuild_vendor_feed(preference)
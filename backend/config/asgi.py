@@ -3,6 +3,7 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import bids.routing
+from bids.middleware import TokenAuthMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
@@ -10,9 +11,11 @@ django_application = get_asgi_application()
 
 application = ProtocolTypeRouter({
     "http": django_application,
-    "websocket": AuthMiddlewareStack(
-        URLRouter(
-            bids.routing.websocket_urlpatterns
+    "websocket": TokenAuthMiddleware(
+        AuthMiddlewareStack(
+            URLRouter(
+                bids.routing.websocket_urlpatterns
+            )
         )
     ),
 })
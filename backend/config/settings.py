@@ -108,11 +108,49 @@ if os.environ.get('DATABASE_URL'):
 
 AUTH_USER_MODEL = 'core.User'
 
+# Channel layer
+# With REDIS_URL set, bid broadcasts go through Redis and reach WebSocket clients
+# on every Daphne worker. Without it the in-memory layer only spans one process.
+# CHANNEL_LAYER_BACKEND swaps the implementation, e.g.
+# channels_redis.pubsub.RedisPubSubChannelLayer.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CHANNEL_LAYER_BACKEND = os.environ.get(
+    'CHANNEL_LAYER_BACKEND',
+    'channels_redis.core.RedisChannelLayer' if REDIS_URL else 'channels.layers.InMemoryChannelLayer'
+)
+
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+        "BACKEND": CHANNEL_LAYER_BACKEND
     }
 }
+if CHANNEL_LAYER_BACKEND.startswith('channels_redis.'):
+    CHANNEL_LAYERS["default"]["CONFIG"] = {
+        "hosts": [REDIS_URL or 'redis://127.0.0.1:6379/0'],
+        "prefix": os.environ.get('CHANNEL_LAYER_PREFIX', 'socketjumper'),
+    }
+
+# Cache
+# Shared through Redis when REDIS_URL is set, so per-process caches don't
+# disagree (bid sequence numbers and replay buffers depend on this).
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+# Bid fan-out (bids/broadcast.py): bids committed within one tick are sent as a
+# single channel-layer message per RFQ group, from a background thread
+# (inline instead with the in-memory layer, which is bound to the server's loop).
+BID_BROADCAST_TICK = float(os.environ.get('BID_BROADCAST_TICK', '0.1'))
+BID_BROADCAST_ASYNC = True
+
+# Reconnect replay (bids/replay.py): events kept per RFQ, and for how long
+BID_REPLAY_SIZE = 200
+BID_REPLAY_TTL = 60 * 60
 
 CORS_ALLOW_ALL_ORIGINS = True 
 CSRF_TRUSTED_ORIGINS = ['https://*.railway.app', 'https://*.onrender.com']
@@ -165,3 +203,11 @@ REST_FRAMEWORK = {
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# User uploads (RFQ item photos, vehicle logos)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+
+# Background workers (core/workers.py) and the files CS PDF jobs write (rfqs/pdf_jobs.py)
+WORKER_PROCESSES = int(os.environ.get('WORKER_PROCESSES', '2'))
+PDF_EXPORT_ROOT = os.environ.get('PDF_EXPORT_ROOT', BASE_DIR / 'exports')
@@ -1,3 +1,26 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import Future
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .workers import on_done
+
+
+class OnDoneTests(SimpleTestCase):
+    """Result handlers run on the result thread, not the thread completing the future."""
+
+    def test_handler_runs_on_result_thread(self):
+        calls = []
+        done = threading.Event()
+
+        def handler(label, future):
+            calls.append((label, future.result(), threading.current_thread().name))
+            done.set()
+
+        future = Future()
+        on_done(future, handler, 'image')
+        future.set_result(42)
+        self.assertTrue(done.wait(5))
+        label, result, thread = calls[0]
+        self.assertEqual((label, result), ('image', 42))
+        self.assertTrue(thread.startswith('worker-results'))
@@ -0,0 +1,57 @@
+"""
+Process pool for CPU-heavy background work (PDF rendering, image processing).
+
+Created lazily in each server process, with spawned children so they don't
+inherit the parent's threads or database connections. Tasks must be
+module-level functions that take plain data and never touch the ORM.
+
+Future callbacks run on the pool's manager thread, which must stay free to
+collect results, so ORM work on a result goes through on_done() instead: it
+runs on one shared result thread with its connection checked before and
+closed after.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_pool = None
+_lock = threading.Lock()
+# One thread: result handlers are short writes, and it holds a single connection
+_results = ThreadPoolExecutor(max_workers=1, thread_name_prefix='worker-results')
+
+
+def get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'WORKER_PROCESSES', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def submit(fn, *args, **kwargs):
+    """Run `fn` in the pool, replacing the pool once if a crashed child broke it."""
+    global _pool
+    try:
+        return get_pool().submit(fn, *args, **kwargs)
+    except BrokenProcessPool:
+        with _lock:
+            _pool = None
+        return get_pool().submit(fn, *args, **kwargs)
+
+
+def on_done(future, fn, *args):
+    """Call fn(*args, future) on the result thread once `future` completes."""
+    def run():
+        close_old_connections()
+        try:
+            fn(*args, future)
+        finally:
+            close_old_connections()
+    future.add_done_callback(lambda f: _results.submit(run))
@@ -4,8 +4,7 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from rfqs.models import VehicleMake, VehicleModel, VehicleYear, VehicleEngine
-from django.db import transaction
+from rfqs.taxonomy import sync_vehicle_taxonomy
 
 # Data Structure:
 # Make -> { ModelName (Code): { "years": [start, end], "engines": ["Engine1", "Engine2"] } }
@@ -153,34 +152,14 @@ JDM_DATA = {
 }
 
 def run():
-    print("WARNING: This script will WIPE all existing vehicle data.")
-    # Removed interactive input for automation
-    
-    with transaction.atomic():
-        print("Deleting existing data...")
-        VehicleMake.objects.all().delete()
-        
-        print("Starting Detailed JDM Data Population...")
-        
-        for make_name, models_data in JDM_DATA.items():
-            make = VehicleMake.objects.create(name=make_name)
-            print(f"Created Make: {make_name}")
-            
-            for model_name, info in models_data.items():
-                model = VehicleModel.objects.create(make=make, name=model_name)
-                
-                # Populate Engines
-                for engine_name in info.get("engines", []):
-                    VehicleEngine.objects.create(model=model, name=engine_name)
-                
-                # Populate Years
-                start_year, end_year = info.get("years", [2000, 2000])
-                for year in range(start_year, end_year + 1):
-                    VehicleYear.objects.create(model=model, year=year)
-                    
-                print(f"  Created Model: {model_name} ({len(info.get('engines'))} engines, {end_year-start_year+1} years)")
-                
-    print("Successfully populated JDM data!")
+    print("Syncing JDM vehicle data (existing ids are kept)...")
+    stats = sync_vehicle_taxonomy(JDM_DATA)
+    for table in ('makes', 'models', 'engines'):
+        print(
+            f"  {table.capitalize()}: {stats[f'{table}_created']} created, "
+            f"{stats[f'{table}_updated']} updated, {stats[f'{table}_deleted']} deleted"
+        )
+    print("Successfully synced JDM data!")
 
 if __name__ == "__main__":
     run()
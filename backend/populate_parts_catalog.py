@@ -2,7 +2,8 @@
 Populate PartCatalog with REAL OEM part numbers for JDM vehicles.
 All part numbers are authentic manufacturer part numbers.
 """
-from rfqs.models import PartCatalog, VehicleMake, VehicleModel
+from rfqs.catalog_import import import_catalog
+from rfqs.models import PartCatalog
 
 # Real Toyota OEM Parts
 TOYOTA_PARTS = [
@@ -178,44 +179,11 @@ def run():
     print("Populating Part Catalog with REAL OEM part numbers...")
     
     all_parts = TOYOTA_PARTS + HONDA_PARTS + NISSAN_PARTS
-    created_count = 0
+    stats = import_catalog(all_parts)
     
-    for part_data in all_parts:
-        # Get make
-        make = None
-        if part_data.get('make'):
-            make = VehicleMake.objects.filter(name=part_data['make']).first()
-            if not make:
-                print(f"Warning: Make '{part_data['make']}' not found, skipping part {part_data['part_number']}")
-                continue
-        
-        # Get model
-        model = None
-        if part_data.get('model') and make:
-            model = VehicleModel.objects.filter(make=make, name=part_data['model']).first()
-            if not model:
-                print(f"Warning: Model '{part_data['model']}' not found for {make.name}, skipping part {part_data['part_number']}")
-                continue
-        
-        # Create or update part
-        part, created = PartCatalog.objects.update_or_create(
-            part_number=part_data['part_number'],
-            defaults={
-                'part_name': part_data['part_name'],
-                'make': make,
-                'model': model,
-                'year_from': part_data.get('year_from'),
-                'year_to': part_data.get('year_to'),
-                'category': part_data.get('category', ''),
-                'manufacturer': part_data.get('manufacturer', ''),
-                'is_oem': part_data.get('is_oem', True),
-                'alternative_numbers': part_data.get('alternative_numbers', ''),
-            }
-        )
-        
-        if created:
-            created_count += 1
-            print(f"✓ Created: {part.part_number} - {part.part_name} ({part.manufacturer})")
+    for reason in ('skipped_unknown_make', 'skipped_unknown_model', 'skipped_invalid'):
+        if stats[reason]:
+            print(f"Warning: {stats[reason]} parts {reason.replace('_', ' ')}")
     
-    print(f"\n✅ Part Catalog populated! Created {created_count} new parts.")
+    print(f"\n✅ Part Catalog populated! Created {stats['created']} new parts, updated {stats['updated']}.")
     print(f"Total parts in catalog: {PartCatalog.objects.count()}")
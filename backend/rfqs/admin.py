@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import RFQ, RFQItem, RFQItemImage, VehicleMake, VehicleModel, VehicleYear
+from .models import RFQ, RFQItem, RFQItemImage, VehicleMake, VehicleModel
 
 class RFQItemInline(admin.TabularInline):
     model = RFQItem
@@ -23,24 +23,23 @@ class VehicleMakeAdmin(admin.ModelAdmin):
 
 @admin.register(VehicleModel)
 class VehicleModelAdmin(admin.ModelAdmin):
-    list_display = ('name', 'make', 'created_at')
+    list_display = ('name', 'make', 'year_from', 'year_to', 'created_at')
     list_filter = ('make',)
     search_fields = ('name', 'make__name')
 
-@admin.register(VehicleYear)
-class VehicleYearAdmin(admin.ModelAdmin):
-    list_display = ('year', 'model')
-    list_filter = ('year', 'model__make')
-    search_fields = ('year', 'model__name')
+from .models import PartCatalog, PartCrossReference
 
-from .models import PartCatalog
+class PartCrossReferenceInline(admin.TabularInline):
+    model = PartCrossReference
+    extra = 0
 
 @admin.register(PartCatalog)
 class PartCatalogAdmin(admin.ModelAdmin):
     list_display = ('part_number', 'part_name', 'make', 'model', 'year_from', 'year_to', 'is_oem')
     list_filter = ('make', 'is_oem', 'category')
-    search_fields = ('part_number', 'part_name', 'alternative_numbers')
+    search_fields = ('part_number', 'part_name', 'cross_references__number')
     autocomplete_fields = ['make', 'model']
+    inlines = [PartCrossReferenceInline]
 
 
 from .models import SavedVehicle
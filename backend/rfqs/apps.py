@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RfqsConfig(AppConfig):
     name = 'rfqs'
+
+    def ready(self):
+        import rfqs.signals
@@ -0,0 +1,86 @@
+"""
+Award engine: turns selected bids into vendor orders.
+
+Everything happens in one transaction with the RFQ row locked, using set-based
+writes, so an award costs a fixed number of queries however many bids it
+covers, and two concurrent award requests for the same RFQ cannot both win.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .counters import refresh_counters
+from .cs import invalidate_cs
+from .models import RFQ, RFQItem
+
+
+class AwardError(Exception):
+    """The selected bids can't be awarded; the message is safe to show the client."""
+
+
+def award_bids(rfq_id, bid_ids):
+    """
+    Accept `bid_ids` on RFQ `rfq_id`, create one VendorOrder per vendor,
+    reject the competing pending bids on the awarded items and update the
+    RFQ status. Returns the created orders.
+    """
+    from bids.models import Bid
+    from orders.models import VendorOrder
+
+    with transaction.atomic():
+        # Serializes awards per RFQ: a second request waits here, then sees the first one's result
+        rfq = RFQ.objects.select_for_update().get(pk=rfq_id)
+
+        selected = list(
+            Bid.objects.filter(id__in=bid_ids, rfq_item__rfq=rfq, status=Bid.Status.PENDING)
+            .values('id', 'vendor_id', 'rfq_item_id', 'amount')
+        )
+        if not selected:
+            raise AwardError('Invalid bids')
+
+        item_ids = {bid['rfq_item_id'] for bid in selected}
+        if len(item_ids) != len(selected):
+            raise AwardError('Only one bid can be awarded per item')
+        if Bid.objects.filter(rfq_item_id__in=item_ids, status=Bid.Status.ACCEPTED).exists():
+            raise AwardError('Some items have already been awarded')
+
+        # Group by Vendor
+        bids_by_vendor = defaultdict(list)
+        for bid in selected:
+            bids_by_vendor[bid['vendor_id']].append(bid)
+
+        orders = VendorOrder.objects.bulk_create([
+            VendorOrder(
+                rfq=rfq,
+                vendor_id=vendor_id,
+                total_amount=sum(bid['amount'] for bid in bids),
+                status=VendorOrder.Status.PENDING_PAYMENT
+            )
+            for vendor_id, bids in bids_by_vendor.items()
+        ])
+
+        OrderBid = VendorOrder.bids.through
+        OrderBid.objects.bulk_create([
+            OrderBid(vendororder_id=order.id, bid_id=bid['id'])
+            for order, bids in zip(orders, bids_by_vendor.values())
+            for bid in bids
+        ])
+
+        selected_ids = [bid['id'] for bid in selected]
+        Bid.objects.filter(id__in=selected_ids).update(status=Bid.Status.ACCEPTED)
+        Bid.objects.filter(
+            rfq_item_id__in=item_ids, status=Bid.Status.PENDING
+        ).exclude(id__in=selected_ids).update(status=Bid.Status.REJECTED)
+
+        # COMPLETED once every item has an accepted bid, otherwise stay open for the rest
+        unawarded = RFQItem.objects.filter(rfq=rfq).exclude(
+            Exists(Bid.objects.filter(rfq_item=OuterRef('pk'), status=Bid.Status.ACCEPTED))
+        )
+        rfq.status = RFQ.Status.BIDDING_OPEN if unawarded.exists() else RFQ.Status.COMPLETED
+        rfq.save(update_fields=['status', 'updated_at'])
+        # The bid updates above skip signals
+        refresh_counters(item_ids)
+        invalidate_cs(rfq.id)
+
+    return orders
@@ -0,0 +1,259 @@
+"""
+Bulk catalog import.
+
+Rows (dicts with the PartCatalog fields plus `make`/`model` names and
+`alternative_numbers`/`superseded_numbers`) are read as a stream and applied
+in chunks, one transaction per chunk. Make and model names resolve through
+maps loaded once up front. Each chunk is diffed against the stored rows with
+one query: new parts are inserted with bulk_create(update_conflicts=...) on
+part_number_normalized, changed parts are written with bulk_update, unchanged
+ones are not touched. A row's cross-reference columns are authoritative for
+its part: missing references are added in bulk and references of that kind
+which the row no longer lists are deleted. The search index is rebuilt only
+for parts whose number, name or cross-references changed; lookups of new and
+removed numbers are dropped from rfqs.lookup's cache.
+Re-running the same feed is a no-op.
+"""
+import csv
+import json
+import time
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .lookup import invalidate_part_numbers
+from .search import normalize_part_number, reindex_parts
+
+CHUNK_SIZE = 2000
+FIELDS = ['part_number', 'part_name', 'make_id', 'model_id', 'year_from', 'year_to',
+          'category', 'manufacturer', 'is_oem']
+CROSS_REFERENCE_COLUMNS = {
+    'alternative_numbers': 'ALTERNATE',
+    'superseded_numbers': 'SUPERSEDED',
+}
+
+
+def read_rows(f, fmt):
+    """Yield dicts from an open CSV or JSONL text file without loading it whole."""
+    if fmt == 'csv':
+        yield from csv.DictReader(f)
+    elif fmt == 'jsonl':
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _text(value):
+    """Cell -> stripped str; JSONL cells may be null or numbers."""
+    return '' if value is None else str(value).strip()
+
+
+def _int_or_none(value):
+    if value in (None, ''):
+        return None
+    return int(value)
+
+
+def _bool(value, default=True):
+    if value in (None, ''):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def _numbers(value):
+    if not value:
+        return []
+    if not isinstance(value, (list, tuple)):
+        value = str(value).split(',')
+    return [_text(number) for number in value if _text(number)]
+
+
+class CatalogImporter:
+    """
+    Applies catalog rows to PartCatalog/PartCrossReference. `stats` counts
+    rows read, created, updated, unchanged and skipped (by reason).
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, dry_run=False):
+        from .models import VehicleMake, VehicleModel
+
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.stats = Counter()
+        self.makes = {name.lower(): pk for pk, name in VehicleMake.objects.values_list('id', 'name')}
+        self.models = {
+            (make_id, name.lower()): pk
+            for pk, make_id, name in VehicleModel.objects.values_list('id', 'make_id', 'name')
+        }
+
+    def run(self, rows, on_chunk=None):
+        started = time.monotonic()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self.apply_chunk(chunk)
+                chunk = []
+                if on_chunk:
+                    on_chunk(self.stats)
+        if chunk:
+            self.apply_chunk(chunk)
+            if on_chunk:
+                on_chunk(self.stats)
+        self.stats['seconds'] = time.monotonic() - started
+        return self.stats
+
+    def _parse(self, row):
+        """
+        Row -> (normalized number, field values, {normalized: (number, kind)},
+        cross-reference kinds the row has columns for), or None to skip.
+        """
+        part_number = _text(row.get('part_number'))
+        normalized = normalize_part_number(part_number)
+        part_name = _text(row.get('part_name'))
+        if not normalized or not part_name:
+            self.stats['skipped_invalid'] += 1
+            return None
+
+        make_id = model_id = None
+        make, model = _text(row.get('make')), _text(row.get('model'))
+        if make:
+            make_id = self.makes.get(make.lower())
+            if make_id is None:
+                self.stats['skipped_unknown_make'] += 1
+                return None
+        if model and make_id:
+            model_id = self.models.get((make_id, model.lower()))
+            if model_id is None:
+                self.stats['skipped_unknown_model'] += 1
+                return None
+
+        try:
+            values = {
+                'part_number': part_number,
+                'part_name': part_name,
+                'make_id': make_id,
+                'model_id': model_id,
+                'year_from': _int_or_none(row.get('year_from')),
+                'year_to': _int_or_none(row.get('year_to')),
+                'category': _text(row.get('category')),
+                'manufacturer': _text(row.get('manufacturer')),
+                'is_oem': _bool(row.get('is_oem')),
+            }
+        except (TypeError, ValueError):
+            self.stats['skipped_invalid'] += 1
+            return None
+
+        cross_refs = {}
+        for column, kind in CROSS_REFERENCE_COLUMNS.items():
+            for number in _numbers(row.get(column)):
+                number_normalized = normalize_part_number(number)
+                if number_normalized and number_normalized != normalized:
+                    cross_refs.setdefault(number_normalized, (number, kind))
+        listed = {kind for column, kind in CROSS_REFERENCE_COLUMNS.items() if column in row}
+        return normalized, values, cross_refs, listed
+
+    def apply_chunk(self, rows):
+        from .models import PartCatalog, PartCrossReference
+
+        parsed = {}
+        for row in rows:
+            self.stats['read'] += 1
+            result = self._parse(row)
+            if result:
+                # A number repeated within the chunk: the last row wins
+                parsed[result[0]] = result[1:]
+        if not parsed:
+            return
+
+        with transaction.atomic():
+            existing = {
+                row['part_number_normalized']: row
+                for row in PartCatalog.objects.filter(part_number_normalized__in=parsed)
+                .values('id', 'part_number_normalized', *FIELDS)
+            }
+            new, changed, reindex = [], [], set()
+            for normalized, (values, _, _) in parsed.items():
+                current = existing.get(normalized)
+                if current is None:
+                    new.append(PartCatalog(part_number_normalized=normalized, **values))
+                elif any(current[field] != value for field, value in values.items()):
+                    changed.append(PartCatalog(
+                        id=current['id'], part_number_normalized=normalized, updated_at=timezone.now(), **values
+                    ))
+                    if current['part_number'] != values['part_number'] or current['part_name'] != values['part_name']:
+                        reindex.add(current['id'])
+                else:
+                    self.stats['unchanged'] += 1
+            self.stats['created'] += len(new)
+            self.stats['updated'] += len(changed)
+            if self.dry_run:
+                transaction.set_rollback(True)
+                return
+
+            # update_conflicts covers a concurrent import inserting the same number
+            PartCatalog.objects.bulk_create(
+                new, update_conflicts=True, unique_fields=['part_number_normalized'],
+                update_fields=[*FIELDS, 'updated_at'],
+            )
+            PartCatalog.objects.bulk_update(changed, [*FIELDS, 'updated_at'], batch_size=500)
+
+            ids = {normalized: row['id'] for normalized, row in existing.items()}
+            if any(part.pk is None for part in new):
+                ids.update(PartCatalog.objects.filter(
+                    part_number_normalized__in=[part.part_number_normalized for part in new]
+                ).values_list('part_number_normalized', 'id'))
+            else:
+                ids.update((part.part_number_normalized, part.pk) for part in new)
+            reindex.update(ids[part.part_number_normalized] for part in new)
+
+            # Cross-references: add the missing ones, correct the kind of known
+            # ones, delete the ones a listed column dropped
+            wanted = {
+                (ids[normalized], number_normalized): (number, kind)
+                for normalized, (_, cross_refs, _) in parsed.items()
+                for number_normalized, (number, kind) in cross_refs.items()
+            }
+            listed = {ids[normalized]: kinds for normalized, (_, _, kinds) in parsed.items()}
+            stored = {
+                (part_id, number_normalized): (pk, kind)
+                for pk, part_id, number_normalized, kind in PartCrossReference.objects.filter(
+                    part_id__in=listed
+                ).values_list('id', 'part_id', 'number_normalized', 'kind')
+            }
+            removed = [
+                pk for (part_id, number_normalized), (pk, kind) in stored.items()
+                if (part_id, number_normalized) not in wanted and kind in listed[part_id]
+            ]
+            added, rekinded = [], []
+            for (part_id, number_normalized), (number, kind) in wanted.items():
+                current = stored.get((part_id, number_normalized))
+                if current is None:
+                    added.append(PartCrossReference(
+                        part_id=part_id, number=number, number_normalized=number_normalized, kind=kind
+                    ))
+                    reindex.add(part_id)
+                elif current[1] != kind:
+                    rekinded.append(PartCrossReference(id=current[0], kind=kind))
+            PartCrossReference.objects.bulk_create(added, batch_size=1000, ignore_conflicts=True)
+            PartCrossReference.objects.bulk_update(rekinded, ['kind'], batch_size=500)
+            # A queryset delete still sends post_delete, which reindexes and invalidates
+            PartCrossReference.objects.filter(id__in=removed).delete()
+            self.stats['cross_references_added'] += len(added)
+            self.stats['cross_references_removed'] += len(removed)
+
+            # Bulk writes skip the post_save receivers that maintain the index and lookup cache
+            reindex_parts(reindex)
+            invalidate_part_numbers(
+                [part.part_number_normalized for part in new] + [ref.number_normalized for ref in added]
+            )
+
+
+def import_catalog(rows, chunk_size=CHUNK_SIZE, dry_run=False, on_chunk=None):
+    """Import an iterable of catalog rows; returns the stats Counter."""
+    return CatalogImporter(chunk_size=chunk_size, dry_run=dry_run).run(rows, on_chunk=on_chunk)
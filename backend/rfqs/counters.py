@@ -0,0 +1,89 @@
+"""
+Denormalized bid summaries on RFQItem (bid_count, vendor_count, min_amount,
+accepted_bid) and RFQ (bid_count, vendor_count).
+
+A new bid is applied as a single UPDATE per table with F()/Least()
+expressions. The distinct-vendor counts are correlated subqueries, and under
+READ COMMITTED a subquery only sees bids committed when its statement
+started; so the RFQ and item rows are locked first (select_for_update), and
+the recount runs after every earlier bidder on them has committed. Bids are
+inserted before the lock is taken, so whichever transaction locks last
+counts them all. A status change touches accepted_bid only. Anything else
+(deleted bids, edited amounts, bulk writes) recomputes the affected rows
+with refresh_counters().
+
+Lock order is RFQ, then its items, everywhere (here, rfqs/awards.py and the
+bulk bid endpoint), so concurrent writers queue instead of deadlocking.
+"""
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least
+
+from .models import RFQ, RFQItem
+
+
+def _count(queryset, group_field, expression):
+    """Scalar subquery: `expression` aggregated over `queryset`, 0 when empty."""
+    return Coalesce(Subquery(
+        queryset.order_by().values(group_field).annotate(n=expression).values('n')
+    ), 0)
+
+
+def _lock_rfqs(rfq_ids):
+    """Row-lock the RFQs, in id order; take this before touching their items."""
+    list(RFQ.objects.select_for_update().filter(pk__in=rfq_ids).order_by('pk').values_list('pk'))
+
+
+def bid_created(bid):
+    from bids.models import Bid
+
+    amount = Value(bid.amount, output_field=DecimalField(max_digits=10, decimal_places=2))
+    accepted = {'accepted_bid': bid.pk} if bid.status == Bid.Status.ACCEPTED else {}
+    rfq_id = RFQItem.objects.values_list('rfq_id', flat=True).get(pk=bid.rfq_item_id)
+    with transaction.atomic():
+        _lock_rfqs([rfq_id])
+        list(RFQItem.objects.select_for_update().filter(pk=bid.rfq_item_id).values_list('pk'))
+        RFQItem.objects.filter(pk=bid.rfq_item_id).update(
+            bid_count=F('bid_count') + 1,
+            min_amount=Least(Coalesce('min_amount', amount), amount),
+            vendor_count=_count(Bid.objects.filter(rfq_item=OuterRef('pk')), 'rfq_item',
+                                Count('vendor', distinct=True)),
+            **accepted,
+        )
+        RFQ.objects.filter(pk=rfq_id).update(
+            bid_count=F('bid_count') + 1,
+            vendor_count=_count(Bid.objects.filter(rfq_item__rfq=OuterRef('pk')), 'rfq_item__rfq',
+                                Count('vendor', distinct=True)),
+        )
+
+
+def bid_status_changed(bid, old_status):
+    from bids.models import Bid
+
+    if bid.status == Bid.Status.ACCEPTED:
+        RFQItem.objects.filter(pk=bid.rfq_item_id).update(accepted_bid=bid.pk)
+    elif old_status == Bid.Status.ACCEPTED:
+        RFQItem.objects.filter(pk=bid.rfq_item_id, accepted_bid=bid.pk).update(accepted_bid=None)
+
+
+def refresh_counters(item_ids):
+    """Recompute every counter for `item_ids` and their RFQs from the bids table."""
+    from bids.models import Bid
+
+    items = RFQItem.objects.filter(pk__in=item_ids)
+    item_bids = Bid.objects.filter(rfq_item=OuterRef('pk'))
+    rfq_bids = Bid.objects.filter(rfq_item__rfq=OuterRef('pk'))
+    with transaction.atomic():
+        _lock_rfqs(items.values('rfq_id'))
+        items.update(
+            bid_count=_count(item_bids, 'rfq_item', Count('pk')),
+            vendor_count=_count(item_bids, 'rfq_item', Count('vendor', distinct=True)),
+            min_amount=Subquery(
+                item_bids.order_by().values('rfq_item').annotate(m=Min('amount')).values('m')
+            ),
+            accepted_bid=Subquery(item_bids.filter(status='ACCEPTED').order_by('id').values('id')[:1]),
+        )
+        RFQ.objects.filter(pk__in=items.values('rfq_id')).update(
+            bid_count=_count(rfq_bids, 'rfq_item__rfq', Count('pk')),
+            vendor_count=_count(rfq_bids, 'rfq_item__rfq', Count('vendor', distinct=True)),
+        )
@@ -0,0 +1,176 @@
+"""
+Comparative statement (CS) matrix: items x vendors grid of each vendor's
+lowest bid per item, with per-vendor totals and the lowest price per item
+highlighted. Built from two queries regardless of RFQ size, and shared by the
+JSON endpoint and the PDF export.
+
+Rendered PDFs are cached per RFQ and generation together with an ETag, a
+hash of everything the PDF shows. Saving an RFQ, item or bid bumps the
+generation (rfqs/signals.py, bids/signals.py); code that writes with
+update()/bulk_create() must call invalidate_cs() itself.
+"""
+import hashlib
+import json
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+
+CS_PDF_TTL = 24 * 60 * 60
+
+
+def can_export_cs(user, rfq):
+    """CS sheets show every vendor's prices: only the RFQ's workshop and admins get them."""
+    return user.is_staff or user.role == 'ADMIN' or rfq.workshop_id == user.id
+
+
+def build_cs_matrix(rfq):
+    """
+    Each cell is the vendor's lowest bid on the item, or their accepted bid once
+    awarded. Returns {
+        'rfq_id': int,
+        'vendors': [{'id', 'name', 'total', 'items_quoted', 'awarded_total'}],
+        'items': [{'id', 'name', 'quantity', 'preferred_category', 'lowest_amount',
+                   'cells': [cell or None, ...]}],   # cells follow the vendors order
+    }
+    where a cell is {'bid_id', 'amount', 'brand', 'part_category', 'status', 'is_lowest'}.
+    """
+    return build_cs_matrices([rfq.id])[rfq.id]
+
+
+def build_cs_matrices(rfq_ids):
+    """build_cs_matrix() for many RFQs at once, still two queries: {rfq_id: matrix}."""
+    from bids.models import Bid
+    from .models import RFQItem
+
+    items_by_rfq = defaultdict(list)
+    items = (
+        RFQItem.objects.filter(rfq_id__in=rfq_ids).order_by('id')
+        .values('id', 'rfq_id', 'name', 'quantity', 'preferred_category')
+    )
+    for item in items:
+        items_by_rfq[item.pop('rfq_id')].append(item)
+
+    # Ordered so the first row seen for each (item, vendor) is that vendor's lowest bid
+    bids_by_rfq = defaultdict(list)
+    bids = (
+        Bid.objects.filter(rfq_item__rfq_id__in=rfq_ids)
+        .order_by('rfq_item_id', 'vendor_id', 'amount', 'id')
+        .values('id', 'rfq_item__rfq_id', 'rfq_item_id', 'vendor_id', 'vendor__username',
+                'amount', 'brand', 'part_category', 'status')
+    )
+    for bid in bids:
+        bids_by_rfq[bid['rfq_item__rfq_id']].append(bid)
+
+    return {
+        rfq_id: _assemble(rfq_id, items_by_rfq[rfq_id], bids_by_rfq[rfq_id])
+        for rfq_id in rfq_ids
+    }
+
+
+def _assemble(rfq_id, items, bids):
+    from bids.models import Bid
+
+    vendor_names = {}
+    grid = {}
+    for bid in bids:
+        vendor_names.setdefault(bid['vendor_id'], bid['vendor__username'])
+        key = (bid['rfq_item_id'], bid['vendor_id'])
+        # An accepted bid stands in for the vendor's lowest one, so post-award sheets show what was bought
+        if key not in grid or bid['status'] == Bid.Status.ACCEPTED:
+            grid[key] = {
+                'bid_id': bid['id'],
+                'amount': bid['amount'],
+                'brand': bid['brand'],
+                'part_category': bid['part_category'],
+                'status': bid['status'],
+                'is_lowest': False,
+            }
+
+    vendor_ids = sorted(vendor_names)
+    vendors = [
+        {'id': vendor_id, 'name': vendor_names[vendor_id], 'total': 0, 'items_quoted': 0, 'awarded_total': 0}
+        for vendor_id in vendor_ids
+    ]
+
+    for item in items:
+        cells = [grid.get((item['id'], vendor_id)) for vendor_id in vendor_ids]
+        quoted = [cell for cell in cells if cell]
+        item['lowest_amount'] = min((cell['amount'] for cell in quoted), default=None)
+        for cell in quoted:
+            cell['is_lowest'] = cell['amount'] == item['lowest_amount']
+        for vendor, cell in zip(vendors, cells):
+            if cell:
+                vendor['total'] += cell['amount']
+                vendor['items_quoted'] += 1
+                if cell['status'] == Bid.Status.ACCEPTED:
+                    vendor['awarded_total'] += cell['amount']
+        item['cells'] = cells
+
+    return {'rfq_id': rfq_id, 'vendors': vendors, 'items': items}
+
+
+def cs_document(rfq):
+    """The matrix plus the RFQ details printed in the PDF header."""
+    return cs_documents([rfq])[0]
+
+
+def cs_documents(rfqs):
+    """cs_document() for each RFQ (with workshop loaded), in order, from two queries."""
+    matrices = build_cs_matrices([rfq.id for rfq in rfqs])
+    documents = []
+    for rfq in rfqs:
+        document = matrices[rfq.id]
+        document['meta'] = {
+            'workshop': rfq.workshop.username,
+            'date': rfq.updated_at.strftime('%Y-%m-%d %H:%M'),
+            'vin': rfq.vin,
+            'make': rfq.make,
+            'model': rfq.model,
+            'year': rfq.year,
+        }
+        documents.append(document)
+    return documents
+
+
+def cs_etag(document):
+    """Content hash of a CS document; equal documents render the same statement."""
+    payload = json.dumps(document, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _generation_key(rfq_id):
+    return f'cs:generation:{rfq_id}'
+
+
+def cs_generation(rfq_id):
+    """
+    Counter bumped by invalidate_cs(). Read it before building the document
+    and cache the PDF under it: a write committing mid-render bumps it, so the
+    stale PDF is stored under a generation nobody reads any more.
+    """
+    # Seeded from the clock so an evicted counter never reuses an old generation
+    cache.add(_generation_key(rfq_id), time.time_ns() // 1000, timeout=None)
+    return cache.get(_generation_key(rfq_id))
+
+
+def _pdf_key(rfq_id, generation):
+    return f'cs:pdf:{rfq_id}:{generation}'
+
+
+def get_cached_pdf(rfq_id, generation):
+    """(etag, pdf bytes) for the RFQ at `generation`, or None."""
+    return cache.get(_pdf_key(rfq_id, generation))
+
+
+def cache_pdf(rfq_id, generation, etag, pdf):
+    cache.set(_pdf_key(rfq_id, generation), (etag, pdf), timeout=CS_PDF_TTL)
+
+
+def invalidate_cs(rfq_id):
+    """Retire the cached PDF once the current transaction commits."""
+    def bump():
+        cs_generation(rfq_id)
+        cache.incr(_generation_key(rfq_id))
+    transaction.on_commit(bump)
@@ -0,0 +1,74 @@
+"""
+Bulk CS export: every statement for a set of RFQs as one streamed ZIP.
+
+RFQs are loaded in chunks with the batched CS queries, rendered in parallel by
+the core.workers pool with a bounded number of renders in flight, and each PDF
+is written to the archive as soon as it is ready and its bytes are sent on.
+Memory stays at roughly one chunk of documents plus the in-flight PDFs,
+whatever the size of the export.
+"""
+import zipfile
+from collections import deque
+
+from django.conf import settings
+
+from core.workers import submit
+from .cs import cs_documents
+from .cs_pdf import render_cs_pdf_bytes
+from .models import RFQ
+
+EXPORT_CHUNK = 50
+
+
+class _StreamBuffer:
+    """Write-only file object for ZipFile; without tell()/seek() it writes a streamable archive."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_cs_documents(rfq_ids):
+    for start in range(0, len(rfq_ids), EXPORT_CHUNK):
+        chunk = list(RFQ.objects.filter(id__in=rfq_ids[start:start + EXPORT_CHUNK])
+                     .select_related('workshop').order_by('id'))
+        yield from cs_documents(chunk)
+
+
+def stream_cs_zip(rfq_ids, mode=None):
+    """Yield the bytes of a ZIP holding one CS PDF per RFQ, in `rfq_ids` order."""
+    buffer = _StreamBuffer()
+    in_flight = deque()
+    max_in_flight = getattr(settings, 'WORKER_PROCESSES', 2) * 2
+
+    def write_oldest(archive):
+        rfq_id, future = in_flight.popleft()
+        archive.writestr(f'cs_rfq_{rfq_id}.pdf', future.result())
+
+    try:
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for document in iter_cs_documents(rfq_ids):
+                in_flight.append((document['rfq_id'], submit(render_cs_pdf_bytes, document, mode)))
+                if len(in_flight) >= max_in_flight:
+                    write_oldest(archive)
+                    yield buffer.pop()
+            while in_flight:
+                write_oldest(archive)
+                yield buffer.pop()
+        # Central directory
+        yield buffer.pop()
+    finally:
+        # Client went away: don't render what nobody will read
+        for _, future in in_flight:
+            future.cancel()
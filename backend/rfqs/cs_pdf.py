@@ -0,0 +1,135 @@
+"""
+Comparative statement PDF layout.
+
+Renders documents from rfqs.cs.cs_document() and touches no models, so it can
+run in a worker process (core.workers) with only the data handed to it.
+"""
+import os
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet
+
+PRE_AWARD = 'PRE_AWARD'
+POST_AWARD = 'POST_AWARD'
+MODES = {
+    PRE_AWARD: 'Pre-Award (Approval)',
+    POST_AWARD: 'Post-Award (Record)',
+}
+
+
+def cs_elements(document, mode=None):
+    """Flowables for one RFQ's statement. `mode` adds the approval/record extras from the spec."""
+    meta = document['meta']
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # Header
+    elements.append(Paragraph("Comparative Statement (CS)", styles['Title']))
+    elements.append(Paragraph(MODES.get(mode, "Marketplace Generation"), styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    # Meta Info
+    meta_data = [
+        [f"Workshop: {meta['workshop']}", f"RFQ ID: #{document['rfq_id']}"],
+        [f"Date: {meta['date']}", f"VIN: {meta['vin']}"],
+        ["", f"{meta['make']} {meta['model']} ({meta['year']})"]
+    ]
+    meta_table = Table(meta_data, colWidths=[300, 200])
+    meta_table.setStyle(TableStyle([
+        ('ALIGN', (1,0), (1,-1), 'RIGHT'),
+        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+        ('FONTNAME', (1,1), (1,1), 'Helvetica-Bold' if mode else 'Helvetica'),
+    ]))
+    elements.append(meta_table)
+    elements.append(Spacer(1, 20))
+
+    # CS Table
+    # Header Row
+    headers = ['Item', 'Qty'] + [vendor['name'] for vendor in document['vendors']]
+    data = [headers]
+    highlights = []
+
+    # Data Rows: post-award sheets mark what was bought, the others the cheapest offer
+    for row_index, item in enumerate(document['items'], start=1):
+        row = [f"{item['name']}\n({item['preferred_category']})", str(item['quantity'])]
+        for col_index, cell in enumerate(item['cells'], start=2):
+            if cell:
+                row.append(f"{cell['amount']}\n{cell['brand']}")
+                if mode == POST_AWARD:
+                    highlighted = cell['status'] == 'ACCEPTED'
+                else:
+                    highlighted = cell['is_lowest']
+                if highlighted:
+                    highlights.append(('BACKGROUND', (col_index, row_index), (col_index, row_index), colors.palegreen))
+            else:
+                row.append("-")
+        data.append(row)
+
+    # Totals Row
+    totals_row = ['Total', ''] + [str(vendor['total']) for vendor in document['vendors']]
+    data.append(totals_row)
+    if mode == POST_AWARD:
+        data.append(['Awarded', ''] + [str(vendor['awarded_total']) for vendor in document['vendors']])
+
+    table = Table(data)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0,0), (-1,0), 12),
+        ('BACKGROUND', (0,len(document['items']) + 1), (-1,-1), colors.beige),
+        ('GRID', (0,0), (-1,-1), 1, colors.black),
+    ] + highlights))
+    elements.append(table)
+
+    # Signature Blocks
+    if mode:
+        elements.append(Spacer(1, 40))
+        signatures = Table(
+            [["_____________________", "_____________________"], ["Prepared by", "Approved by"]],
+            colWidths=[250, 250]
+        )
+        signatures.setStyle(TableStyle([('ALIGN', (0,0), (-1,-1), 'CENTER')]))
+        elements.append(signatures)
+
+    return elements
+
+
+def render_cs_pdf(document, out, mode=None):
+    """Write the CS PDF for `document` to `out` (a path or a binary file object)."""
+    SimpleDocTemplate(out, pagesize=A4).build(cs_elements(document, mode))
+
+
+def render_cs_pdf_file(documents, path, mode=None):
+    """
+    Worker-process entry point: render `documents` into one PDF at `path`, one
+    statement per page run. Written under a temporary name and renamed, so a
+    file at `path` is always complete; failures leave `<path>.err` instead.
+    """
+    tmp_path = f'{path}.tmp'
+    try:
+        elements = []
+        for document in documents:
+            if elements:
+                elements.append(PageBreak())
+            elements.extend(cs_elements(document, mode))
+        SimpleDocTemplate(tmp_path, pagesize=A4).build(elements)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        with open(f'{path}.err', 'w') as f:
+            f.write(f'{type(e).__name__}: {e}')
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def render_cs_pdf_bytes(document, mode=None):
+    """Worker-process entry point: one statement as PDF bytes."""
+    buffer = BytesIO()
+    render_cs_pdf(document, buffer, mode)
+    return buffer.getvalue()
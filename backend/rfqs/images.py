@@ -0,0 +1,139 @@
+"""
+RFQ item photo ingestion.
+
+Uploads are stored as-is inside the request's transaction. After commit each
+one goes through ingest_image() in the core.workers pool: EXIF orientation is
+applied, the photo is re-encoded as a JPEG capped at MAX_DIMENSION with its
+EXIF (GPS, device data) dropped, and THUMBNAIL_SIZES thumbnails are written.
+Output is content-addressed by the SHA-256 of the original upload, so the same
+photo uploaded twice is encoded and stored once. Failures are retried up to
+MAX_ATTEMPTS times; a failed image keeps serving its original upload.
+
+Pending or failed rows can be reprocessed with process_images(ids).
+Assumes local file storage (MEDIA_ROOT), which the worker processes write to.
+"""
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from core.workers import on_done, submit
+
+logger = logging.getLogger(__name__)
+
+MAX_DIMENSION = 2048
+THUMBNAIL_SIZES = (160, 480)
+JPEG_QUALITY = 80
+MAX_ATTEMPTS = 3
+
+
+def _write_jpeg(image, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    image.save(tmp_path, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    os.replace(tmp_path, path)
+
+
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def ingest_image(path, media_root):
+    """
+    Worker-process task: encode the upload at `path` and its thumbnails under
+    `media_root`. Returns storage names and dimensions; touches no models.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    base = f'rfq_items/{digest[:2]}/{digest}'
+    result = {
+        'content_hash': digest,
+        'image': f'{base}.jpg',
+        'thumbnails': {str(size): f'{base}_{size}.jpg' for size in THUMBNAIL_SIZES},
+    }
+    names = [result['image'], *result['thumbnails'].values()]
+
+    # Seen before: reuse the stored files
+    if all(os.path.exists(os.path.join(media_root, name)) for name in names):
+        with Image.open(os.path.join(media_root, result['image'])) as image:
+            result['width'], result['height'] = image.size
+        return result
+
+    with Image.open(BytesIO(data)) as original:
+        image = _to_rgb(ImageOps.exif_transpose(original))
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION))
+    result['width'], result['height'] = image.size
+    _write_jpeg(image, os.path.join(media_root, result['image']))
+
+    for size, name in zip(THUMBNAIL_SIZES, result['thumbnails'].values()):
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        _write_jpeg(thumbnail, os.path.join(media_root, name))
+    return result
+
+
+def save_item_images(uploads):
+    """
+    Store [(item, uploaded_file)] as RFQItemImage rows with one INSERT, and
+    queue their ingestion for after the surrounding transaction commits.
+    """
+    from .models import RFQItemImage
+
+    images = []
+    for item, upload in uploads:
+        image = RFQItemImage(item=item)
+        image.image.save(upload.name, upload, save=False)
+        images.append(image)
+    RFQItemImage.objects.bulk_create(images)
+
+    image_ids = [image.id for image in images]
+    transaction.on_commit(lambda: process_images(image_ids))
+    return images
+
+
+def process_images(image_ids):
+    from .models import RFQItemImage
+
+    for image_id, name in RFQItemImage.objects.filter(id__in=image_ids).values_list('id', 'image'):
+        _submit(image_id, os.path.join(settings.MEDIA_ROOT, name), attempt=1)
+
+
+def _submit(image_id, path, attempt):
+    on_done(submit(ingest_image, path, str(settings.MEDIA_ROOT)), _finished, image_id, path, attempt)
+
+
+def _finished(image_id, path, attempt, future):
+    # Runs on core.workers' result thread, outside any request
+    try:
+        record_ingestion(image_id, path, attempt, future.result())
+    except Exception:
+        if attempt < MAX_ATTEMPTS:
+            _submit(image_id, path, attempt + 1)
+            return
+        logger.exception("Image ingestion failed for RFQItemImage %s", image_id)
+        from .models import RFQItemImage
+        RFQItemImage.objects.filter(pk=image_id).update(status=RFQItemImage.Status.FAILED, attempts=attempt)
+
+
+def record_ingestion(image_id, path, attempt, result):
+    """Point the row at the encoded files and drop the raw upload."""
+    from .models import RFQItemImage
+
+    RFQItemImage.objects.filter(pk=image_id).update(
+        status=RFQItemImage.Status.READY, attempts=attempt, **result
+    )
+    if os.path.abspath(path) != os.path.abspath(os.path.join(settings.MEDIA_ROOT, result['image'])):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,123 @@
+"""
+Cached exact part-number lookups.
+
+Maps a normalized part number to the ids of the catalog entries it names:
+the entry whose own number it is first, then entries that list it as an
+alternate or superseded number. Two tiers sit in front of the database: a
+bounded per-process LRU and the shared Django cache. Misses are cached too
+(as an empty tuple) on the exact-lookup paths, so unknown numbers typed into
+RFQs stop costing queries; search input is never cached as a miss.
+
+Catalog and cross-reference writes invalidate their numbers in both tiers
+after commit (rfqs/signals.py, rfqs/catalog_import.py). Other processes drop
+their local copy within LOCAL_TTL seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .search import lookup_part_number, normalize_part_number
+
+LOCAL_SIZE = 10000
+LOCAL_TTL = 30
+SHARED_TTL = 60 * 60
+NEGATIVE_TTL = 5 * 60
+
+
+class _LRU:
+    """Thread-safe bounded mapping whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = _LRU(LOCAL_SIZE, LOCAL_TTL)
+
+
+def _key(normalized):
+    return f'parts:lookup:{normalized}'
+
+
+def _query(normalized):
+    rows = lookup_part_number(normalized).values_list('id', 'part_number_normalized')
+    # The entry carrying the number itself leads; then cross-references by id
+    return tuple(pk for pk, number in sorted(rows, key=lambda row: (row[1] != normalized, row[0])))
+
+
+def part_ids(number, cache_misses=True):
+    """
+    Ids of the catalog entries `number` resolves to, canonical entry first.
+    Pass cache_misses=False for partial input (search as you type), so
+    keystrokes don't fill both tiers with negative entries.
+    """
+    normalized = normalize_part_number(number)
+    if not normalized:
+        return ()
+
+    ids = _local.get(normalized)
+    if ids is None:
+        ids = cache.get(_key(normalized))
+        if ids is None:
+            ids = _query(normalized)
+            if not ids and not cache_misses:
+                return ids
+            cache.set(_key(normalized), ids, timeout=SHARED_TTL if ids else NEGATIVE_TTL)
+        _local.set(normalized, ids)
+    return ids
+
+
+def resolve_part(number):
+    """Id of the canonical catalog entry for `number`, or None."""
+    ids = part_ids(number)
+    return ids[0] if ids else None
+
+
+def invalidate_part_numbers(numbers):
+    """Forget cached lookups of `numbers` (normalized) once the current transaction commits."""
+    numbers = {number for number in numbers if number}
+    if not numbers:
+        return
+
+    def invalidate():
+        _local.delete_many(numbers)
+        cache.delete_many([_key(number) for number in numbers])
+    transaction.on_commit(invalidate)
+
+
+def clear_local():
+    """Drop this process's tier (tests, or after a bulk job)."""
+    _local.clear()
@@ -0,0 +1,51 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rfqs.catalog_import import CHUNK_SIZE, import_catalog, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import parts from a CSV or JSONL catalog feed. Columns: part_number, part_name, "
+        "make, model, year_from, year_to, category, manufacturer, is_oem, "
+        "alternative_numbers, superseded_numbers (comma-separated). Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Feed file, or - for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+
+    def handle(self, *args, path, format, chunk_size, dry_run, **options):
+        fmt = format or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt == 'json':
+            fmt = 'jsonl'
+        if fmt not in ('csv', 'jsonl'):
+            raise CommandError("Cannot tell the feed format; pass --format csv|jsonl")
+
+        def progress(stats):
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"  {stats['read']} rows read")
+
+        f = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            stats = import_catalog(read_rows(f, fmt), chunk_size=chunk_size, dry_run=dry_run, on_chunk=progress)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+        seconds = stats['seconds']
+        rate = stats['read'] / seconds if seconds else 0
+        skipped = sum(n for key, n in stats.items() if key.startswith('skipped_'))
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Dry run: ' if dry_run else ''}{stats['read']} rows in {seconds:.1f}s ({rate:.0f} rows/s): "
+            f"{stats['created']} created, {stats['updated']} updated, {stats['unchanged']} unchanged, "
+            f"{skipped} skipped; {stats['cross_references_added']} cross-references added, "
+            f"{stats['cross_references_removed']} removed"
+        ))
+        for key in sorted(stats):
+            if key.startswith('skipped_') and stats[key]:
+                self.stdout.write(f"  {key.replace('_', ' ')}: {stats[key]}")
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:31
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of rfqs.search's helpers as they were for this migration. Later
+# data migrations import them from here, so edits to the live module can't
+# change what an applied migration did.
+NON_ALNUM = re.compile(r'[^0-9A-Za-z]+')
+
+
+def normalize_part_number(value):
+    return NON_ALNUM.sub('', value or '').upper()
+
+
+def make_grams(*values):
+    grams = set()
+    for value in values:
+        normalized = normalize_part_number(value)
+        for i in range(len(normalized) - 2):
+            grams.add(normalized[i:i + 3])
+    return grams
+
+
+def backfill_search_index(apps, schema_editor):
+    PartCatalog = apps.get_model('rfqs', 'PartCatalog')
+    PartSearchGram = apps.get_model('rfqs', 'PartSearchGram')
+
+    grams = []
+    for part in PartCatalog.objects.only('id', 'part_number', 'part_name', 'alternative_numbers').iterator():
+        part.part_number_normalized = normalize_part_number(part.part_number)
+        part.save(update_fields=['part_number_normalized'])
+        grams.extend(
+            PartSearchGram(part_id=part.id, gram=gram)
+            for gram in make_grams(part.part_number, part.part_name, *part.alternative_numbers.split(','))
+        )
+    PartSearchGram.objects.bulk_create(grams, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0008_rfq_engine_savedvehicle_engine_vehicleengine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partcatalog',
+            name='part_number_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Part number upper-cased with separators removed', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='PartSearchGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_grams', to='rfqs.partcatalog')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gram', 'part'], name='rfqs_partse_gram_f07f94_idx')],
+                'unique_together': {('part', 'gram')},
+            },
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:32
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen in 0009 rather than the live rfqs.search
+normalize_part_number = import_module('rfqs.migrations.0009_partcatalog_search_index').normalize_part_number
+
+
+def split_alternative_numbers(apps, schema_editor):
+    PartCatalog = apps.get_model('rfqs', 'PartCatalog')
+    PartCrossReference = apps.get_model('rfqs', 'PartCrossReference')
+
+    rows = []
+    for part in PartCatalog.objects.exclude(alternative_numbers='').only('id', 'alternative_numbers'):
+        seen = set()
+        for number in part.alternative_numbers.split(','):
+            number = number.strip()
+            normalized = normalize_part_number(number)
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                rows.append(PartCrossReference(part_id=part.id, number=number, number_normalized=normalized))
+    PartCrossReference.objects.bulk_create(rows, batch_size=1000)
+
+
+def join_alternative_numbers(apps, schema_editor):
+    PartCatalog = apps.get_model('rfqs', 'PartCatalog')
+    PartCrossReference = apps.get_model('rfqs', 'PartCrossReference')
+
+    numbers = {}
+    for part_id, number in PartCrossReference.objects.values_list('part_id', 'number'):
+        numbers.setdefault(part_id, []).append(number)
+    for part_id, part_numbers in numbers.items():
+        PartCatalog.objects.filter(id=part_id).update(alternative_numbers=', '.join(part_numbers))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0009_partcatalog_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartCrossReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(help_text='Alternative or superseded part number', max_length=100)),
+                ('number_normalized', models.CharField(db_index=True, editable=False, max_length=100)),
+                ('kind', models.CharField(choices=[('ALTERNATE', 'Alternate'), ('SUPERSEDED', 'Superseded')], default='ALTERNATE', max_length=20)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cross_references', to='rfqs.partcatalog')),
+            ],
+            options={
+                'verbose_name': 'Part Cross-Reference',
+                'unique_together': {('part', 'number_normalized')},
+            },
+        ),
+        migrations.RunPython(split_alternative_numbers, join_alternative_numbers),
+        migrations.RemoveField(
+            model_name='partcatalog',
+            name='alternative_numbers',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0010_partcrossreference'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(fields=['status', 'updated_at', 'id'], name='rfqs_rfq_status_f38e57_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(fields=['updated_at'], name='rfqs_rfq_updated_8a1604_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, group_field, expression):
+    return Coalesce(Subquery(
+        queryset.order_by().values(group_field).annotate(n=expression).values('n')
+    ), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    """rfqs.counters.refresh_counters as of this migration, over every row."""
+    RFQ = apps.get_model('rfqs', 'RFQ')
+    RFQItem = apps.get_model('rfqs', 'RFQItem')
+    Bid = apps.get_model('bids', 'Bid')
+
+    item_bids = Bid.objects.filter(rfq_item=OuterRef('pk'))
+    RFQItem.objects.update(
+        bid_count=_count(item_bids, 'rfq_item', Count('pk')),
+        vendor_count=_count(item_bids, 'rfq_item', Count('vendor', distinct=True)),
+        min_amount=Subquery(
+            item_bids.order_by().values('rfq_item').annotate(m=Min('amount')).values('m')
+        ),
+        accepted_bid=Subquery(item_bids.filter(status='ACCEPTED').order_by('id').values('id')[:1]),
+    )
+
+    rfq_bids = Bid.objects.filter(rfq_item__rfq=OuterRef('pk'))
+    RFQ.objects.update(
+        bid_count=_count(rfq_bids, 'rfq_item__rfq', Count('pk')),
+        vendor_count=_count(rfq_bids, 'rfq_item__rfq', Count('vendor', distinct=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0004_bid_vendor_item_idx'),
+        ('rfqs', '0011_rfq_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rfq',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='rfq',
+            name='vendor_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='rfqitem',
+            name='accepted_bid',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bids.bid'),
+        ),
+        migrations.AddField(
+            model_name='rfqitem',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='rfqitem',
+            name='min_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='rfqitem',
+            name='vendor_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0012_bid_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rfqitemimage',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='rfqitemimage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the original upload', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='rfqitemimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='rfqitemimage',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='rfqitemimage',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, help_text='Max edge in px -> storage name'),
+        ),
+        migrations.AddField(
+            model_name='rfqitemimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
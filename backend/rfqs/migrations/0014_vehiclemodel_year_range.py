@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:54
+
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+
+def years_to_ranges(apps, schema_editor):
+    VehicleModel = apps.get_model('rfqs', 'VehicleModel')
+    VehicleYear = apps.get_model('rfqs', 'VehicleYear')
+    ranges = VehicleYear.objects.values('model_id').annotate(first=Min('year'), last=Max('year'))
+    models_by_id = VehicleModel.objects.in_bulk([r['model_id'] for r in ranges])
+    for r in ranges:
+        model = models_by_id[r['model_id']]
+        model.year_from, model.year_to = r['first'], r['last']
+    VehicleModel.objects.bulk_update(models_by_id.values(), ['year_from', 'year_to'], batch_size=500)
+
+
+def ranges_to_years(apps, schema_editor):
+    VehicleModel = apps.get_model('rfqs', 'VehicleModel')
+    VehicleYear = apps.get_model('rfqs', 'VehicleYear')
+    VehicleYear.objects.bulk_create([
+        VehicleYear(model_id=model_id, year=year)
+        for model_id, first, last in VehicleModel.objects.filter(
+            year_from__isnull=False, year_to__isnull=False
+        ).values_list('id', 'year_from', 'year_to')
+        for year in range(first, last + 1)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0013_rfqitemimage_ingestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiclemodel',
+            name='year_from',
+            field=models.PositiveIntegerField(blank=True, help_text='First production year', null=True),
+        ),
+        migrations.AddField(
+            model_name='vehiclemodel',
+            name='year_to',
+            field=models.PositiveIntegerField(blank=True, help_text='Last production year', null=True),
+        ),
+        migrations.RunPython(years_to_ranges, ranges_to_years),
+        migrations.DeleteModel(
+            name='VehicleYear',
+        ),
+    ]
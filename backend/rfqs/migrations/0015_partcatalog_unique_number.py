@@ -0,0 +1,74 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:56
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+# Frozen in 0009 rather than the live rfqs.search
+make_grams = import_module('rfqs.migrations.0009_partcatalog_search_index').make_grams
+
+
+CATALOG_FIELDS = ['part_name', 'make_id', 'model_id', 'year_from', 'year_to', 'category', 'manufacturer', 'is_oem']
+
+
+def merge_duplicate_numbers(apps, schema_editor):
+    """
+    Keep the oldest entry per normalized number and move the others' relations
+    onto it. Refuses to run when duplicates disagree on catalog data, since
+    merging would silently drop one of the versions.
+    """
+    PartCatalog = apps.get_model('rfqs', 'PartCatalog')
+    PartCrossReference = apps.get_model('rfqs', 'PartCrossReference')
+    PartSearchGram = apps.get_model('rfqs', 'PartSearchGram')
+
+    duplicates = list(
+        PartCatalog.objects.values('part_number_normalized')
+        .annotate(n=Count('id'), keep=Min('id')).filter(n__gt=1)
+    )
+    conflicting = [
+        group['part_number_normalized'] for group in duplicates
+        if PartCatalog.objects.filter(part_number_normalized=group['part_number_normalized'])
+        .values(*CATALOG_FIELDS).distinct().count() > 1
+    ]
+    if conflicting:
+        raise RuntimeError(
+            f"{len(conflicting)} part numbers have catalog entries with different data "
+            f"(e.g. {', '.join(conflicting[:10])}); reconcile them before migrating."
+        )
+
+    for group in duplicates:
+        keep = group['keep']
+        others = list(
+            PartCatalog.objects.filter(part_number_normalized=group['part_number_normalized'])
+            .exclude(id=keep).values_list('id', flat=True)
+        )
+        # Cross-references: move those the survivor lacks; the rest name numbers
+        # that already resolve to it (or its own number) and go with their entry
+        known = set(PartCrossReference.objects.filter(part_id=keep).values_list('number_normalized', flat=True))
+        known.add(group['part_number_normalized'])
+        grams = []
+        for ref in PartCrossReference.objects.filter(part_id__in=others).order_by('id'):
+            if ref.number_normalized in known:
+                continue
+            known.add(ref.number_normalized)
+            PartCrossReference.objects.filter(id=ref.id).update(part_id=keep)
+            grams.extend(PartSearchGram(part_id=keep, gram=gram) for gram in make_grams(ref.number))
+        PartSearchGram.objects.bulk_create(grams, ignore_conflicts=True)
+        PartCatalog.objects.filter(id__in=others).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0014_vehiclemodel_year_range'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_numbers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='partcatalog',
+            name='part_number_normalized',
+            field=models.CharField(editable=False, help_text='Part number upper-cased with separators removed', max_length=100, unique=True),
+        ),
+    ]
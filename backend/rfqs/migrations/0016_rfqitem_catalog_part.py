@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:00
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen in 0009 rather than the live rfqs.search
+normalize_part_number = import_module('rfqs.migrations.0009_partcatalog_search_index').normalize_part_number
+
+
+def resolve_existing_items(apps, schema_editor):
+    RFQItem = apps.get_model('rfqs', 'RFQItem')
+    PartCatalog = apps.get_model('rfqs', 'PartCatalog')
+    PartCrossReference = apps.get_model('rfqs', 'PartCrossReference')
+
+    numbers = {}
+    for item_id, part_number in RFQItem.objects.exclude(part_number='').values_list('id', 'part_number'):
+        numbers.setdefault(normalize_part_number(part_number), []).append(item_id)
+    numbers.pop('', None)
+
+    # Same precedence as rfqs.lookup: the entry's own number, then the lowest-id cross-reference
+    resolved = {}
+    for part_id, number in PartCrossReference.objects.filter(
+        number_normalized__in=numbers
+    ).order_by('-part_id').values_list('part_id', 'number_normalized'):
+        resolved[number] = part_id
+    resolved.update(PartCatalog.objects.filter(
+        part_number_normalized__in=numbers
+    ).values_list('part_number_normalized', 'id'))
+
+    items = [
+        RFQItem(id=item_id, catalog_part_id=part_id)
+        for number, part_id in resolved.items()
+        for item_id in numbers[number]
+    ]
+    RFQItem.objects.bulk_update(items, ['catalog_part'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0015_partcatalog_unique_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rfqitem',
+            name='catalog_part',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rfq_items', to='rfqs.partcatalog'),
+        ),
+        migrations.RunPython(resolve_existing_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:11
+
+import time
+
+from django.db import migrations, models
+
+
+def seed_version(apps, schema_editor):
+    # Clock-based like the cache counter it replaces, so clients' stored versions stay older
+    TaxonomyVersion = apps.get_model('rfqs', 'TaxonomyVersion')
+    TaxonomyVersion.objects.get_or_create(pk=1, defaults={'version': time.time_ns() // 1000})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0016_rfqitem_catalog_part'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaxonomyVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_version, migrations.RunPython.noop),
+    ]
@@ -15,10 +15,27 @@ class VehicleMake(models.Model):
 class VehicleModel(models.Model):
     make = models.ForeignKey(VehicleMake, on_delete=models.CASCADE, related_name='models')
     name = models.CharField(max_length=50)
+    # Production years, inclusive; a model generation is one contiguous range
+    year_from = models.PositiveIntegerField(null=True, blank=True, help_text="First production year")
+    year_to = models.PositiveIntegerField(null=True, blank=True, help_text="Last production year")
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.make.name} {self.name}"
+
+    @property
+    def years(self):
+        """Production years, newest first."""
+        if self.year_from is None or self.year_to is None:
+            return []
+        return list(range(self.year_to, self.year_from - 1, -1))
+
+    def covers_year(self, year):
+        if self.year_from is not None and year < self.year_from:
+            return False
+        if self.year_to is not None and year > self.year_to:
+            return False
+        return True
     
     class Meta:
         ordering = ['name']
@@ -36,17 +53,9 @@ class VehicleEngine(models.Model):
         ordering = ['name']
         unique_together = ['model', 'name']
 
-class VehicleYear(models.Model):
-    model = models.ForeignKey(VehicleModel, on_delete=models.CASCADE, related_name='years')
-    year = models.PositiveIntegerField()
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    def __str__(self):
-        return f"{self.model} ({self.year})"
-
-    class Meta:
-        ordering = ['-year']
-        unique_together = ['model', 'year']
+class TaxonomyVersion(models.Model):
+    """Single row counting vehicle taxonomy changes; see rfqs/taxonomy.py."""
+    version = models.BigIntegerField(default=0)
 
 class PartCatalog(models.Model):
     """
@@ -54,6 +63,7 @@ class PartCatalog(models.Model):
     Part numbers are actual manufacturer part numbers.
     """
     part_number = models.CharField(max_length=100, db_index=True, help_text="Manufacturer part number")
+    part_number_normalized = models.CharField(max_length=100, unique=True, editable=False, help_text="Part number upper-cased with separators removed")
     part_name = models.CharField(max_length=200, help_text="Common name of the part")
     
     # Vehicle Compatibility (null = universal part)
@@ -67,14 +77,19 @@ class PartCatalog(models.Model):
     manufacturer = models.CharField(max_length=100, blank=True, help_text="OEM or aftermarket brand")
     is_oem = models.BooleanField(default=True, help_text="True if genuine OEM part")
     
-    # Alternative/Cross-reference part numbers
-    alternative_numbers = models.TextField(blank=True, help_text="Comma-separated alternative part numbers")
-    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.part_number} - {self.part_name}"
+
+    def save(self, *args, **kwargs):
+        from .search import normalize_part_number
+        self.part_number_normalized = normalize_part_number(self.part_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'part_number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'part_number_normalized'}
+        super().save(*args, **kwargs)
     
     def is_compatible_with(self, make_id, model_id, year):
         """Check if this part is compatible with given vehicle"""
@@ -113,6 +128,54 @@ class PartCatalog(models.Model):
         verbose_name_plural = "Part Catalog"
 
 
+class PartCrossReference(models.Model):
+    """
+    Alternative or superseded number that resolves to a catalog entry.
+    """
+    class Kind(models.TextChoices):
+        ALTERNATE = 'ALTERNATE', 'Alternate'
+        SUPERSEDED = 'SUPERSEDED', 'Superseded'
+
+    part = models.ForeignKey(PartCatalog, on_delete=models.CASCADE, related_name='cross_references')
+    number = models.CharField(max_length=100, help_text="Alternative or superseded part number")
+    number_normalized = models.CharField(max_length=100, db_index=True, editable=False)
+    kind = models.CharField(max_length=20, choices=Kind.choices, default=Kind.ALTERNATE)
+
+    def __str__(self):
+        return f"{self.number} -> {self.part.part_number}"
+
+    def save(self, *args, **kwargs):
+        from .search import normalize_part_number
+        self.number_normalized = normalize_part_number(self.number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'number_normalized'}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        unique_together = ['part', 'number_normalized']
+        verbose_name = "Part Cross-Reference"
+
+
+class PartSearchGram(models.Model):
+    """
+    Trigram of a catalog entry's normalized part number, cross-reference
+    numbers or name.
+    Maintained by rfqs.search.reindex_parts; backs substring search.
+    """
+    part = models.ForeignKey(PartCatalog, on_delete=models.CASCADE, related_name='search_grams')
+    gram = models.CharField(max_length=3)
+
+    def __str__(self):
+        return f"{self.gram} -> {self.part_id}"
+
+    class Meta:
+        unique_together = ['part', 'gram']
+        indexes = [
+            models.Index(fields=['gram', 'part']),
+        ]
+
+
 class SavedVehicle(models.Model):
     """
     User's saved vehicles for My Garage feature.
@@ -195,9 +258,21 @@ class RFQ(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Bid summary, maintained by rfqs/counters.py
+    bid_count = models.PositiveIntegerField(default=0, editable=False)
+    vendor_count = models.PositiveIntegerField(default=0, editable=False)
+
     def __str__(self):
         return f"{self.year} {self.make} {self.model} - {self.get_status_display()}"
 
+    class Meta:
+        indexes = [
+            # Vendor feed keyset pagination and delta sync
+            # (also the open-RFQ branch of the vendor RFQ list, index-only)
+            models.Index(fields=['status', 'updated_at', 'id']),
+            models.Index(fields=['updated_at']),
+        ]
+
 class RFQItem(models.Model):
     class Category(models.TextChoices):
         OEM = 'GENUINE_OEM', 'Genuine OEM'
@@ -213,6 +288,8 @@ class RFQItem(models.Model):
     rfq = models.ForeignKey(RFQ, on_delete=models.CASCADE, related_name='items')
     name = models.CharField(max_length=100) # Or part number
     part_number = models.CharField(max_length=100, blank=True, help_text="OEM or aftermarket part number")
+    # Catalog entry part_number resolved to when the item was written (rfqs/lookup.py)
+    catalog_part = models.ForeignKey(PartCatalog, on_delete=models.SET_NULL, null=True, blank=True, related_name='rfq_items')
     quantity = models.PositiveIntegerField(default=1)
     entry_method = models.CharField(max_length=10, choices=EntryMethod.choices, default=EntryMethod.MANUAL)
     preferred_category = models.CharField(max_length=30, choices=Category.choices, default=Category.ANY)
@@ -221,11 +298,30 @@ class RFQItem(models.Model):
     side = models.CharField(max_length=20, blank=True, help_text="e.g. LH, RH")
     color = models.CharField(max_length=30, blank=True)
     notes = models.TextField(blank=True)
+
+    # Bid summary, maintained by rfqs/counters.py
+    bid_count = models.PositiveIntegerField(default=0, editable=False)
+    vendor_count = models.PositiveIntegerField(default=0, editable=False)
+    min_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    accepted_bid = models.ForeignKey('bids.Bid', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+')
     
     def __str__(self):
         return f"{self.name} (Qty: {self.quantity})"
 
 class RFQItemImage(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        READY = 'READY', 'Ready'
+        FAILED = 'FAILED', 'Failed'
+
     item = models.ForeignKey(RFQItem, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='rfq_items/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    # Filled in by the ingestion pipeline (rfqs/images.py); until then `image` is the raw upload
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 of the original upload")
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    thumbnails = models.JSONField(default=dict, blank=True, help_text="Max edge in px -> storage name")
+    attempts = models.PositiveSmallIntegerField(default=0)
@@ -0,0 +1,88 @@
+"""
+Background CS PDF jobs.
+
+A job renders in the core.workers pool straight into PDF_EXPORT_ROOT, and its
+state is just the files there, so any server process can report on it:
+
+    <id>.json      job record (owner, download filename)
+    <id>.pdf       finished document
+    <id>.pdf.err   failure message
+"""
+import json
+import re
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+from core.workers import submit
+from .cs_pdf import render_cs_pdf_file
+
+JOB_TTL = 24 * 60 * 60
+JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class PDFJobStatus:
+    PENDING = 'PENDING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+
+
+def export_root():
+    root = Path(settings.PDF_EXPORT_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def _paths(job_id):
+    root = export_root()
+    return root / f'{job_id}.json', root / f'{job_id}.pdf', root / f'{job_id}.pdf.err'
+
+
+def _prune():
+    """Drop job files older than JOB_TTL."""
+    cutoff = time.time() - JOB_TTL
+    for path in export_root().iterdir():
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+
+
+def start_job(owner, documents, filename, mode=None):
+    """Queue `documents` (from rfqs.cs.cs_document) for rendering into one PDF; returns the job id."""
+    _prune()
+    job_id = uuid.uuid4().hex
+    record, pdf, err = _paths(job_id)
+    record.write_text(json.dumps({'owner_id': owner.id, 'filename': filename, 'mode': mode}))
+
+    def record_crash(future):
+        # A child that died hard never got to write its own .err
+        if future.exception() is not None and not err.exists():
+            err.write_text(f'{type(future.exception()).__name__}: {future.exception()}')
+
+    submit(render_cs_pdf_file, documents, str(pdf), mode).add_done_callback(record_crash)
+    return job_id
+
+
+def get_job(job_id, user):
+    """The job's state for `user`, or None if it doesn't exist or isn't theirs."""
+    if not JOB_ID_RE.match(job_id):
+        return None
+    record, pdf, err = _paths(job_id)
+    try:
+        job = json.loads(record.read_text())
+    except FileNotFoundError:
+        return None
+    if job['owner_id'] != user.id and not user.is_staff:
+        return None
+
+    job['id'] = job_id
+    job['path'] = pdf
+    if pdf.exists():
+        job['status'] = PDFJobStatus.DONE
+    elif err.exists():
+        job['status'] = PDFJobStatus.FAILED
+        job['error'] = err.read_text()
+    else:
+        job['status'] = PDFJobStatus.PENDING
+    return job
@@ -1,87 +1,146 @@
+from io import BytesIO
+
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse, Http404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
+from django.utils.http import quote_etag
 from rest_framework.views import APIView
-from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework import permissions, status
 from .models import RFQ
-from bids.models import Bid
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from .cs import can_export_cs, cs_document, cs_etag, cs_generation, get_cached_pdf, cache_pdf
+from .cs_export import stream_cs_zip, iter_cs_documents
+from .cs_pdf import render_cs_pdf, MODES, PRE_AWARD, POST_AWARD
+from .pdf_jobs import start_job, get_job, PDFJobStatus
+
+
+def job_payload(request, job):
+    payload = {'job_id': job['id'], 'status': job['status']}
+    if job['status'] == PDFJobStatus.DONE:
+        payload['download_url'] = request.build_absolute_uri(reverse('pdf-job-download', args=[job['id']]))
+    elif job['status'] == PDFJobStatus.FAILED:
+        payload['error'] = job['error']
+    return payload
+
 
 class RFQPDFView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, pk=None):
-        rfq = get_object_or_404(RFQ, pk=pk)
-        
-        # Calculate CS Data (Same logic as before)
-        bids = Bid.objects.filter(rfq_item__rfq=rfq)
-        vendors = list(set([b.vendor for b in bids]))
-        vendors.sort(key=lambda u: u.id) 
-
-        # Build PDF
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="cs_rfq_{rfq.id}.pdf"'
-        
-        doc = SimpleDocTemplate(response, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Header
-        elements.append(Paragraph("Comparative Statement (CS)", styles['Title']))
-        elements.append(Paragraph("Marketplace Generation", styles['Normal']))
-        elements.append(Spacer(1, 20))
-        
-        # Meta Info
-        meta_data = [
-            [f"Workshop: {rfq.workshop.username}", f"RFQ ID: #{rfq.id}"],
-            [f"Date: {rfq.updated_at.strftime('%Y-%m-%d %H:%M')}", f"VIN: {rfq.vin}"],
-            ["", f"{rfq.make} {rfq.model} ({rfq.year})"]
-        ]
-        meta_table = Table(meta_data, colWidths=[300, 200])
-        meta_table.setStyle(TableStyle([
-            ('ALIGN', (1,0), (1,-1), 'RIGHT'),
-            ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ]))
-        elements.append(meta_table)
-        elements.append(Spacer(1, 20))
-        
-        # CS Table
-        # Header Row
-        headers = ['Item', 'Qty'] + [v.username for v in vendors]
-        data = [headers]
-        
-        # Data Rows
-        items = rfq.items.all()
-        for item in items:
-            row = [f"{item.name}\n({item.preferred_category})", str(item.quantity)]
-            for vendor in vendors:
-                bid = bids.filter(rfq_item=item, vendor=vendor).order_by('amount').first()
-                if bid:
-                    row.append(f"{bid.amount}\n{bid.brand}")
-                else:
-                    row.append("-")
-            data.append(row)
-            
-        # Totals Row
-        totals_row = ['Total', '']
-        for vendor in vendors:
-            total = sum([b.amount for b in bids.filter(vendor=vendor)])
-            totals_row.append(str(total))
-        data.append(totals_row)
-
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0,0), (-1,0), 12),
-            ('BACKGROUND', (0,-1), (-1,-1), colors.beige),
-            ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ]))
-        elements.append(table)
-        
-        doc.build(elements)
+        rfq = get_object_or_404(RFQ.objects.select_related('workshop'), pk=pk)
+        if not can_export_cs(request.user, rfq):
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        generation = cs_generation(rfq.id)
+        cached = get_cached_pdf(rfq.id, generation)
+        if cached:
+            etag, pdf = cached
+        else:
+            document = cs_document(rfq)
+            etag, pdf = quote_etag(cs_etag(document)), None
+
+        # Content unchanged since the client's copy: answer 304 without rendering
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            if pdf is None:
+                buffer = BytesIO()
+                render_cs_pdf(document, buffer)
+                pdf = buffer.getvalue()
+                cache_pdf(rfq.id, generation, etag, pdf)
+            response = HttpResponse(pdf, content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="cs_rfq_{rfq.id}.pdf"'
+        response['ETag'] = etag
+        # Clients may keep the file but must revalidate it each time it is opened
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+class RFQPDFJobView(APIView):
+    """Render a CS PDF in the background: POST {"mode": "PRE_AWARD" | "POST_AWARD"}."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk=None):
+        rfq = get_object_or_404(RFQ.objects.select_related('workshop'), pk=pk)
+        if not can_export_cs(request.user, rfq):
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        mode = request.data.get('mode', PRE_AWARD)
+        if mode not in MODES:
+            return Response({'error': f"mode must be one of {', '.join(MODES)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        filename = f"cs_rfq_{rfq.id}_{mode.lower()}.pdf"
+        job_id = start_job(request.user, [cs_document(rfq)], filename, mode)
+        job = get_job(job_id, request.user)
+        return Response(job_payload(request, job), status=status.HTTP_202_ACCEPTED)
+
+
+class PDFJobView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id=None):
+        job = get_job(job_id, request.user)
+        if job is None:
+            raise Http404
+        return Response(job_payload(request, job))
+
+
+class PDFJobDownloadView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id=None):
+        job = get_job(job_id, request.user)
+        if job is None:
+            raise Http404
+        if job['status'] != PDFJobStatus.DONE:
+            return Response(job_payload(request, job), status=status.HTTP_409_CONFLICT)
+        # Streamed from disk by the server (sendfile where available), not read into memory
+        return FileResponse(open(job['path'], 'rb'), as_attachment=True,
+                            filename=job['filename'], content_type='application/pdf')
+
+
+class CSExportView(APIView):
+    """
+    CS sheets for every RFQ completed in a date range:
+    GET ?from=YYYY-MM-DD&to=YYYY-MM-DD[&output=zip|pdf][&mode=POST_AWARD|PRE_AWARD]
+
+    `zip` (default) streams one PDF per RFQ, rendered in parallel. `pdf` merges
+    them into one document, which is a single render, so it runs as a
+    background job like rfqs/<id>/pdf/jobs/ and answers 202 with the job.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_RFQS = 1000
+
+    def get(self, request):
+        user = request.user
+        if user.is_staff or user.role == 'ADMIN':
+            rfqs = RFQ.objects.all()
+        elif user.role == 'WORKSHOP':
+            rfqs = RFQ.objects.filter(workshop=user)
+        else:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        date_from = parse_date(request.query_params.get('from', ''))
+        date_to = parse_date(request.query_params.get('to', ''))
+        if not date_from or not date_to:
+            return Response({'error': 'from and to dates (YYYY-MM-DD) are required'}, status=status.HTTP_400_BAD_REQUEST)
+        output = request.query_params.get('output', 'zip')
+        mode = request.query_params.get('mode', POST_AWARD)
+        if output not in ('zip', 'pdf') or mode not in MODES:
+            return Response({'error': f"output must be zip or pdf, mode one of {', '.join(MODES)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rfq_ids = list(
+            rfqs.filter(status=RFQ.Status.COMPLETED, updated_at__date__range=(date_from, date_to))
+            .order_by('id').values_list('id', flat=True)[:self.MAX_RFQS + 1]
+        )
+        if len(rfq_ids) > self.MAX_RFQS:
+            return Response({'error': f'More than {self.MAX_RFQS} RFQs in range; narrow the dates'}, status=status.HTTP_400_BAD_REQUEST)
+
+        filename = f"cs_{date_from}_{date_to}"
+        if output == 'pdf':
+            job_id = start_job(user, list(iter_cs_documents(rfq_ids)), f'{filename}.pdf', mode)
+            return Response(job_payload(request, get_job(job_id, user)), status=status.HTTP_202_ACCEPTED)
+
+        response = StreamingHttpResponse(stream_cs_zip(rfq_ids, mode), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
         return response
@@ -0,0 +1,234 @@
+"""
+Indexed search over the parts catalog.
+
+Part numbers are stored normalized (upper-case, alphanumerics only) so a
+prefix lookup is a range scan on a B-tree index. Substring lookups go through
+PartSearchGram, a trigram index built from the normalized part number,
+cross-reference numbers and part name. Only two-character queries, which
+have no trigram, scan part names, and that scan stops at SHORT_NAME_LIMIT
+hits. Alternate and superseded numbers live in PartCrossReference and
+resolve through its normalized index.
+"""
+import re
+
+from django.db.models import (
+    BooleanField, Case, Count, Exists, ExpressionWrapper, IntegerField, OuterRef, Q, Value, When,
+)
+
+GRAM_SIZE = 3
+SEARCH_LIMIT = 10
+# Queries shorter than a trigram match names by scan, stopped after this many hits
+SHORT_NAME_LIMIT = 50
+
+_NON_ALNUM = re.compile(r'[^0-9A-Za-z]+')
+
+
+def normalize_part_number(value):
+    """'04465-02280' / '04465 02280' / '0446502280' all become '0446502280'."""
+    return _NON_ALNUM.sub('', value or '').upper()
+
+
+def make_grams(*values):
+    """Distinct trigrams of the normalized form of each value."""
+    grams = set()
+    for value in values:
+        normalized = normalize_part_number(value)
+        for i in range(len(normalized) - GRAM_SIZE + 1):
+            grams.add(normalized[i:i + GRAM_SIZE])
+    return grams
+
+
+def prefix_q(field, prefix):
+    """
+    Prefix match expressed as a half-open range [prefix, next_prefix) so the
+    database can answer it from the index on every backend (LIKE 'X%' is not
+    index-assisted on SQLite or on Postgres with a non-C collation).
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+def vehicle_from_params(params):
+    """
+    Parse vehicle_make / vehicle_model / vehicle_year query params.
+    Returns (make_id, model_id, year), or None if no vehicle was given or a
+    value is not an integer.
+    """
+    make_id = params.get('vehicle_make')
+    model_id = params.get('vehicle_model')
+    year = params.get('vehicle_year')
+
+    if not (make_id or model_id or year):
+        return None
+
+    try:
+        return (
+            int(make_id) if make_id else None,
+            int(model_id) if model_id else None,
+            int(year) if year else None,
+        )
+    except (ValueError, TypeError):
+        return None
+
+
+def compatibility_q(make_id, model_id, year):
+    """
+    SQL form of PartCatalog.is_compatible_with: universal parts always match,
+    otherwise make, model and year range restrictions must all be satisfied.
+    """
+    universal = Q(make__isnull=True, model__isnull=True)
+
+    make_ok = Q(make__isnull=True)
+    if make_id:
+        make_ok |= Q(make_id=make_id)
+    model_ok = Q(model__isnull=True)
+    if model_id:
+        model_ok |= Q(model_id=model_id)
+
+    restricted = make_ok & model_ok
+    if year:
+        restricted &= Q(year_from__isnull=True) | Q(year_from__lte=year)
+        restricted &= Q(year_to__isnull=True) | Q(year_to__gte=year)
+
+    return universal | restricted
+
+
+def with_compatibility(queryset, vehicle, compatible_only=False):
+    """
+    Annotate `compatible` for the given (make_id, model_id, year) and rank
+    compatible parts first, or drop incompatible ones when compatible_only.
+    Ordering keeps any existing `match_rank` as the tie-breaker.
+    """
+    q = compatibility_q(*vehicle)
+    if compatible_only:
+        queryset = queryset.filter(q)
+    queryset = queryset.annotate(
+        compatible=ExpressionWrapper(q, output_field=BooleanField())
+    )
+    ordering = ['-compatible']
+    if 'match_rank' in queryset.query.annotations:
+        ordering.append('match_rank')
+    return queryset.order_by(*ordering, 'part_number')
+
+
+def reindex_parts(part_ids):
+    """Rebuild the trigram rows for the given catalog entries."""
+    from .models import PartCatalog, PartCrossReference, PartSearchGram
+
+    part_ids = list(part_ids)
+    if not part_ids:
+        return
+
+    cross_refs = {}
+    for part_id, number in PartCrossReference.objects.filter(
+        part_id__in=part_ids
+    ).values_list('part_id', 'number'):
+        cross_refs.setdefault(part_id, []).append(number)
+
+    PartSearchGram.objects.filter(part_id__in=part_ids).delete()
+    rows = []
+    for part_id, part_number, part_name in PartCatalog.objects.filter(
+        id__in=part_ids
+    ).values_list('id', 'part_number', 'part_name'):
+        rows.extend(
+            PartSearchGram(part_id=part_id, gram=gram)
+            for gram in make_grams(part_number, part_name, *cross_refs.get(part_id, []))
+        )
+    PartSearchGram.objects.bulk_create(rows, batch_size=1000)
+
+
+def lookup_part_number(number, queryset=None):
+    """
+    Catalog entries whose primary or cross-reference number equals `number`
+    after normalization. Both sides are indexed equality lookups.
+    """
+    from .models import PartCatalog, PartCrossReference
+
+    if queryset is None:
+        queryset = PartCatalog.objects.all()
+
+    normalized = normalize_part_number(number)
+    if not normalized:
+        return queryset.none()
+
+    return queryset.filter(
+        Q(part_number_normalized=normalized) |
+        Q(pk__in=PartCrossReference.objects.filter(
+            number_normalized=normalized
+        ).values('part_id'))
+    )
+
+
+def _gram_candidates(normalized):
+    """Subquery of part ids whose trigram set covers every trigram of the query."""
+    from .models import PartSearchGram
+
+    grams = make_grams(normalized)
+    return (
+        PartSearchGram.objects.filter(gram__in=grams)
+        .values('part_id')
+        .annotate(matched=Count('gram'))
+        .filter(matched=len(grams))
+        .values('part_id')
+    )
+
+
+def search_parts(query, queryset=None, exact_ids=()):
+    """
+    Return a ranked queryset of catalog entries matching `query`.
+
+    Ranking: `exact_ids` (entries the query names exactly), then part number
+    prefix, then part number substring, then part name. Two-character queries
+    match part number prefixes and at most SHORT_NAME_LIMIT names.
+    The caller is expected to slice the result.
+    """
+    from .models import PartCatalog, PartCrossReference
+
+    if queryset is None:
+        queryset = PartCatalog.objects.all()
+
+    normalized = normalize_part_number(query)
+    if len(normalized) < 2:
+        return queryset.none()
+
+    cross_ref_prefix = PartCrossReference.objects.filter(
+        prefix_q('number_normalized', normalized)
+    )
+    is_prefix = (
+        prefix_q('part_number_normalized', normalized) |
+        Q(pk__in=cross_ref_prefix.values('part_id'))
+    )
+    match = is_prefix
+    if len(normalized) >= GRAM_SIZE:
+        # Trigram candidates still need verifying: sharing every gram does not
+        # guarantee they appear contiguously.
+        candidates = _gram_candidates(normalized)
+        cross_ref_contains = PartCrossReference.objects.filter(
+            part_id__in=candidates, number_normalized__contains=normalized
+        )
+        match |= Q(pk__in=candidates) & (
+            Q(part_number_normalized__contains=normalized) |
+            Q(part_name__icontains=query) |
+            Q(pk__in=cross_ref_contains.values('part_id'))
+        )
+    else:
+        # Too short for the trigram index: a LIMITed name scan, so the cost is
+        # bounded and two-letter names ("O2 sensor" -> "o2") still come up
+        name_matches = queryset.filter(part_name__icontains=query).values('pk')[:SHORT_NAME_LIMIT]
+        match |= Q(pk__in=name_matches)
+
+    if exact_ids:
+        match |= Q(pk__in=exact_ids)
+
+    return queryset.filter(match).annotate(
+        match_rank=Case(
+            When(pk__in=exact_ids, then=Value(-1)),
+            When(is_prefix, then=Value(0)),
+            When(part_number_normalized__contains=normalized, then=Value(1)),
+            When(Exists(PartCrossReference.objects.filter(
+                part=OuterRef('pk'), number_normalized__contains=normalized
+            )), then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+    ).order_by('match_rank', 'part_number')
@@ -1,5 +1,13 @@
+import json
+import re
+
 from rest_framework import serializers
-from .models import RFQ, RFQItem, VehicleMake, VehicleModel, VehicleYear, SavedVehicle, VehicleEngine
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from .models import RFQ, RFQItem, RFQItemImage, VehicleMake, VehicleModel, SavedVehicle, VehicleEngine
+from .lookup import resolve_part
 
 class VehicleMakeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,12 +17,7 @@ class VehicleMakeSerializer(serializers.ModelSerializer):
 class VehicleModelSerializer(serializers.ModelSerializer):
     class Meta:
         model = VehicleModel
-        fields = ['id', 'name', 'make']
-
-class VehicleYearSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = VehicleYear
-        fields = ['id', 'year', 'model']
+        fields = ['id', 'name', 'make', 'year_from', 'year_to']
 
 class VehicleEngineSerializer(serializers.ModelSerializer):
     class Meta:
@@ -34,71 +37,131 @@ class SavedVehicleSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'registration_display']
 
+    def validate(self, attrs):
+        model_id = attrs.get('model_id', getattr(self.instance, 'model_id', None))
+        year = attrs.get('year', getattr(self.instance, 'year', None))
+        if model_id is not None and year is not None:
+            vehicle_model = VehicleModel.objects.filter(pk=model_id).only('name', 'year_from', 'year_to').first()
+            if vehicle_model and not vehicle_model.covers_year(year):
+                raise serializers.ValidationError(
+                    {'year': f'{year} is outside the production years of {vehicle_model.name}.'}
+                )
+        return attrs
 
-from .models import PartCatalog
+
+from .models import PartCatalog, PartCrossReference
+from .search import vehicle_from_params
 
 class PartCatalogSerializer(serializers.ModelSerializer):
     is_compatible = serializers.SerializerMethodField()
     make_name = serializers.CharField(source='make.name', read_only=True)
     model_name = serializers.CharField(source='model.name', read_only=True)
+    alternative_numbers = serializers.SerializerMethodField()
     
     class Meta:
         model = PartCatalog
         fields = [
             'id', 'part_number', 'part_name', 'make', 'make_name', 
             'model', 'model_name', 'year_from', 'year_to',
-            'category', 'manufacturer', 'is_oem', 'is_compatible'
+            'category', 'manufacturer', 'is_oem', 'alternative_numbers', 'is_compatible'
         ]
     
+    def get_alternative_numbers(self, obj):
+        """Alternate numbers as the comma-separated string this field has always been"""
+        # Filtered in Python so a prefetch of cross_references is used
+        refs = sorted(obj.cross_references.all(), key=lambda ref: ref.pk)
+        return ', '.join(ref.number for ref in refs if ref.kind == PartCrossReference.Kind.ALTERNATE)
+
     def get_is_compatible(self, obj):
         """Check compatibility with vehicle from context"""
+        # Search annotates this in SQL; fall back to the model check otherwise
+        if hasattr(obj, 'compatible'):
+            return obj.compatible
+
         request = self.context.get('request')
         if not request:
             return None
         
-        make_id = request.query_params.get('vehicle_make')
-        model_id = request.query_params.get('vehicle_model')
-        year = request.query_params.get('vehicle_year')
-        
-        if not (make_id or model_id or year):
-            return None  # No vehicle specified
+        vehicle = vehicle_from_params(request.query_params)
+        if not vehicle:
+            return None  # No vehicle specified (or unparseable)
         
-        try:
-            make_id = int(make_id) if make_id else None
-            model_id = int(model_id) if model_id else None
-            year = int(year) if year else None
-            return obj.is_compatible_with(make_id, model_id, year)
-        except (ValueError, TypeError):
-            return None
+        return obj.is_compatible_with(*vehicle)
+
+
+def validate_image_upload(upload):
+    """Pillow-checked upload, or serializers.ValidationError."""
+    try:
+        return serializers.ImageField().run_validation(upload)
+    except DjangoValidationError as e:
+        raise serializers.ValidationError(e.messages)
+
+
+class RFQItemImageSerializer(serializers.ModelSerializer):
+    thumbnails = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RFQItemImage
+        fields = ['id', 'image', 'thumbnails', 'width', 'height', 'status', 'uploaded_at']
+        read_only_fields = ['width', 'height', 'status']
+
+    def get_thumbnails(self, obj):
+        """{max edge in px: URL}; empty until the pipeline has processed the upload."""
+        from django.core.files.storage import default_storage
+        request = self.context.get('request')
+        urls = {}
+        for size, name in obj.thumbnails.items():
+            url = default_storage.url(name)
+            urls[size] = request.build_absolute_uri(url) if request else url
+        return urls
+
+
+def resolve_catalog_part(attrs):
+    """Link an item to the catalog entry its part number resolves to (cached, see rfqs/lookup.py)."""
+    if 'part_number' in attrs:
+        attrs['catalog_part_id'] = resolve_part(attrs['part_number'])
+    return attrs
 
 
 class RFQItemSerializer(serializers.ModelSerializer):
+    images = RFQItemImageSerializer(many=True, read_only=True)
     my_bid = serializers.SerializerMethodField()
     winning_bid_id = serializers.SerializerMethodField()
 
     class Meta:
         model = RFQItem
-        fields = ['id', 'name', 'part_number', 'quantity', 'entry_method', 'preferred_category', 'side', 'color', 'notes', 'my_bid', 'winning_bid_id']
+        fields = ['id', 'name', 'part_number', 'catalog_part', 'quantity', 'entry_method', 'preferred_category', 'side', 'color', 'notes', 'images', 'my_bid', 'winning_bid_id',
+                  'bid_count', 'vendor_count', 'min_amount']
+        read_only_fields = ['catalog_part', 'bid_count', 'vendor_count', 'min_amount']
+
+    def validate(self, attrs):
+        return resolve_catalog_part(attrs)
 
     def get_my_bid(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user.role == 'VENDOR':
-            bid = obj.bids.filter(vendor=request.user).first()
+            # Prefetched by RFQReadSerializer.setup_eager_loading
+            if hasattr(obj, 'my_bids'):
+                bid = obj.my_bids[0] if obj.my_bids else None
+            else:
+                bid = obj.bids.filter(vendor=request.user).first()
             if bid:
                  from bids.serializers import BidSerializer
                  return BidSerializer(bid).data
         return None
 
     def get_winning_bid_id(self, obj):
-        # Return ID of the accepted bid if any
-        from bids.models import Bid
-        bid = obj.bids.filter(status=Bid.Status.ACCEPTED).first()
-        return bid.id if bid else None
+        # Return ID of the accepted bid if any (maintained by rfqs/counters.py)
+        return obj.accepted_bid_id
 
 class RFQItemStandaloneSerializer(serializers.ModelSerializer):
     class Meta:
         model = RFQItem
-        fields = ['id', 'rfq', 'name', 'part_number', 'quantity', 'entry_method', 'preferred_category', 'side', 'color', 'notes']
+        fields = ['id', 'rfq', 'name', 'part_number', 'catalog_part', 'quantity', 'entry_method', 'preferred_category', 'side', 'color', 'notes']
+        read_only_fields = ['catalog_part']
+
+    def validate(self, attrs):
+        return resolve_catalog_part(attrs)
 
 class RFQReadSerializer(serializers.ModelSerializer):
     items = RFQItemSerializer(many=True, read_only=True)
@@ -106,25 +169,106 @@ class RFQReadSerializer(serializers.ModelSerializer):
     workshop_shop_name = serializers.CharField(source='workshop.shop_name', read_only=True)
     workshop_rating = serializers.DecimalField(source='workshop.rating', max_digits=3, decimal_places=2, read_only=True)
     workshop_address = serializers.CharField(source='workshop.shop_address', read_only=True)
-    item_count = serializers.IntegerField(source='items.count', read_only=True)
+    item_count = serializers.SerializerMethodField()
     
     class Meta:
         model = RFQ
         fields = ['id', 'workshop_name', 'workshop_shop_name', 'workshop_rating', 'workshop_address', 
                   'vin', 'make', 'model', 'year', 'trim', 'engine', 
                   'reg_city', 'reg_series', 'reg_number1', 'reg_number2',
-                  'status', 'created_at', 'items', 'item_count']
+                  'status', 'created_at', 'items', 'item_count', 'bid_count', 'vendor_count']
+
+    @staticmethod
+    def setup_eager_loading(queryset, user):
+        """
+        Load everything the serializer touches in a fixed number of queries:
+        workshop join, annotated item count, items, their images and (for vendors) the
+        requesting vendor's own bids, instead of per-RFQ and per-item lookups.
+        Bid totals and the winning bid are columns (rfqs/counters.py).
+        """
+        from bids.models import Bid
+
+        item_count = RFQItem.objects.filter(rfq=OuterRef('pk')).order_by().values('rfq').annotate(
+            n=Count('pk')
+        ).values('n')
+        prefetches = [
+            Prefetch('items', queryset=RFQItem.objects.order_by('id')),
+            Prefetch('items__images', queryset=RFQItemImage.objects.order_by('id')),
+        ]
+        if user.is_authenticated and user.role == 'VENDOR':
+            prefetches.append(Prefetch(
+                'items__bids',
+                queryset=Bid.objects.filter(vendor=user).select_related('vendor').order_by('id'),
+                to_attr='my_bids'
+            ))
+
+        return queryset.select_related('workshop').annotate(
+            item_count=Coalesce(Subquery(item_count), 0)
+        ).prefetch_related(*prefetches)
+
+    def get_item_count(self, obj):
+        if hasattr(obj, 'item_count'):
+            return obj.item_count
+        return obj.items.count()
 
 class RFQCreateSerializer(serializers.ModelSerializer):
+    """
+    Accepts JSON, or multipart with `items` as a JSON string and each item's
+    photos as files named `items[<index>][images]`.
+    """
     items = RFQItemSerializer(many=True, required=False)
 
+    IMAGE_FIELD_RE = re.compile(r'^items\[(\d+)\]\[images\]$')
+    MAX_IMAGES_PER_ITEM = 10
+
     class Meta:
         model = RFQ
         fields = ['id', 'vin', 'make', 'model', 'year', 'trim', 'engine', 'reg_city', 'reg_series', 'reg_number1', 'reg_number2', 'items']
-    
+
+    def to_internal_value(self, data):
+        if hasattr(data, 'getlist') and isinstance(data.get('items'), str):
+            data = data.dict()
+            try:
+                data['items'] = json.loads(data['items'])
+            except ValueError:
+                raise serializers.ValidationError({'items': ['Must be a JSON list.']})
+        validated = super().to_internal_value(data)
+        if self.instance is None:
+            validated['item_images'] = self.validate_item_images(len(validated.get('items', [])))
+        return validated
+
+    def validate_item_images(self, item_count):
+        """{item index: [uploaded files]} from the request's multipart files."""
+        request = self.context.get('request')
+        files = request.FILES if request else {}
+        item_images = {}
+        for key in files:
+            match = self.IMAGE_FIELD_RE.match(key)
+            if not match:
+                continue
+            index = int(match.group(1))
+            uploads = files.getlist(key)
+            if index >= item_count:
+                raise serializers.ValidationError({key: ['No item with this index.']})
+            if len(uploads) > self.MAX_IMAGES_PER_ITEM:
+                raise serializers.ValidationError({key: [f'At most {self.MAX_IMAGES_PER_ITEM} images per item.']})
+            try:
+                item_images[index] = [validate_image_upload(upload) for upload in uploads]
+            except serializers.ValidationError as e:
+                raise serializers.ValidationError({key: e.detail})
+        return item_images
+
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
-        rfq = RFQ.objects.create(**validated_data)
-        for item_data in items_data:
-            RFQItem.objects.create(rfq=rfq, **item_data)
+        item_images = validated_data.pop('item_images', {})
+        with transaction.atomic():
+            rfq = RFQ.objects.create(**validated_data)
+            items = RFQItem.objects.bulk_create([RFQItem(rfq=rfq, **item_data) for item_data in items_data])
+            if item_images:
+                from .images import save_item_images
+                save_item_images([
+                    (items[index], upload)
+                    for index, uploads in sorted(item_images.items())
+                    for upload in uploads
+                ])
         return rfq
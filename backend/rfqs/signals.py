@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .models import RFQ, RFQItem, PartCatalog, PartCrossReference, VehicleMake, VehicleModel, VehicleEngine
+from .search import reindex_parts
+from .cs import invalidate_cs
+from .taxonomy import bump_taxonomy_version
+from .lookup import invalidate_part_numbers
+
+@receiver(post_init, sender=PartCatalog)
+def remember_part_number(sender, instance, **kwargs):
+    # The number the lookup cache knows this entry by; __dict__ so deferred fields aren't loaded
+    instance._cached_number = instance.__dict__.get('part_number_normalized')
+
+@receiver(post_save, sender=PartCatalog)
+def part_number_saved(sender, instance, **kwargs):
+    if instance.part_number_normalized != instance._cached_number:
+        invalidate_part_numbers([instance.part_number_normalized, instance._cached_number])
+        instance._cached_number = instance.part_number_normalized
+
+@receiver(post_delete, sender=PartCatalog)
+def part_deleted(sender, instance, **kwargs):
+    # Its cross-references are cascade-deleted and invalidate their own numbers
+    invalidate_part_numbers([instance.part_number_normalized])
+
+@receiver(post_save, sender=PartCatalog)
+def part_saved(sender, instance, update_fields=None, **kwargs):
+    # Only the number and name feed the search index
+    if update_fields is not None and not {'part_number', 'part_name'} & set(update_fields):
+        return
+    reindex_parts([instance.pk])
+
+@receiver(post_save, sender=PartCrossReference)
+def cross_reference_saved(sender, instance, **kwargs):
+    invalidate_part_numbers([instance.number_normalized])
+    reindex_parts([instance.part_id])
+
+@receiver(post_delete, sender=PartCrossReference)
+def cross_reference_deleted(sender, instance, **kwargs):
+    invalidate_part_numbers([instance.number_normalized])
+    # Deferred: when the part itself is being deleted the cascade is still
+    # running here, and re-creating its grams mid-delete would break it.
+    part_id = instance.part_id
+    transaction.on_commit(lambda: reindex_parts([part_id]))
+
+@receiver([post_save, post_delete], sender=RFQ)
+def rfq_changed(sender, instance, **kwargs):
+    invalidate_cs(instance.pk)
+
+@receiver([post_save, post_delete], sender=RFQItem)
+def rfq_item_changed(sender, instance, **kwargs):
+    invalidate_cs(instance.rfq_id)
+
+@receiver([post_save, post_delete], sender=VehicleMake)
+@receiver([post_save, post_delete], sender=VehicleModel)
+@receiver([post_save, post_delete], sender=VehicleEngine)
+def vehicle_taxonomy_changed(sender, **kwargs):
+    bump_taxonomy_version()
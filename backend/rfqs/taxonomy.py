@@ -0,0 +1,158 @@
+"""
+Vehicle taxonomy bundle: every make -> model -> year range/engines in one payload.
+
+The serialized bundle is cached under the current taxonomy version, a
+counter in the TaxonomyVersion row. Any Vehicle* row change bumps it in the
+same transaction (rfqs/signals.py; bulk writers call bump_taxonomy_version()
+themselves), so every process sees the new version as soon as the change
+commits and rebuilds the bundle, whatever cache backend it uses. The ETag
+hashes the exact response body, version included, so a 304 is only sent when
+the client already holds those bytes.
+
+sync_vehicle_taxonomy() brings the tables in line with a source mapping by
+set difference, so rows that survive keep their ids.
+"""
+import hashlib
+import json
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+
+BUNDLE_TTL = 24 * 60 * 60
+
+
+def taxonomy_version():
+    from .models import TaxonomyVersion
+
+    version = TaxonomyVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_taxonomy_version():
+    """Bump the version as part of the current transaction."""
+    from .models import TaxonomyVersion
+
+    if not TaxonomyVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        # Seeded from the clock so versions never repeat ones handed out before
+        TaxonomyVersion.objects.get_or_create(pk=1, defaults={'version': time.time_ns() // 1000})
+
+
+def build_bundle():
+    """The taxonomy as nested dicts, from one query per table (years as year_from/year_to)."""
+    from .models import VehicleMake, VehicleModel, VehicleEngine
+
+    engines = {}
+    for engine in VehicleEngine.objects.order_by('name').values('id', 'name', 'model_id'):
+        engines.setdefault(engine.pop('model_id'), []).append(engine)
+    models_by_make = {}
+    for model in VehicleModel.objects.order_by('name').values('id', 'name', 'make_id', 'year_from', 'year_to'):
+        model['engines'] = engines.get(model['id'], [])
+        models_by_make.setdefault(model.pop('make_id'), []).append(model)
+
+    return [
+        {
+            'id': make['id'],
+            'name': make['name'],
+            'logo': default_storage.url(make['logo']) if make['logo'] else None,
+            'models': models_by_make.get(make['id'], []),
+        }
+        for make in VehicleMake.objects.order_by('name').values('id', 'name', 'logo')
+    ]
+
+
+def get_bundle():
+    """(version, etag, JSON bytes) for the current taxonomy, built at most once per version."""
+    version = taxonomy_version()
+    key = f'vehicles:taxonomy:bundle:{version}'
+    cached = cache.get(key)
+    if cached is None:
+        makes = json.dumps(build_bundle(), separators=(',', ':')).encode()
+        body = b'{"version":%d,"makes":%s}' % (version, makes)
+        cached = (hashlib.sha256(body).hexdigest(), body)
+        cache.set(key, cached, timeout=BUNDLE_TTL)
+    return (version, *cached)
+
+
+def sync_vehicle_taxonomy(data, prune=True):
+    """
+    Apply `data` ({make: {model: {"years": [from, to], "engines": [...]}}})
+    with bulk inserts, a bulk update of changed year ranges and, when `prune`,
+    deletes of rows missing from it. Existing makes, models and engines keep
+    their ids, so PartCatalog and SavedVehicle references stay valid.
+    Returns a Counter of rows created/updated/deleted per table.
+    """
+    from .models import VehicleMake, VehicleModel, VehicleEngine
+
+    stats = Counter()
+    with transaction.atomic():
+        makes = dict(VehicleMake.objects.values_list('name', 'id'))
+        VehicleMake.objects.bulk_create([VehicleMake(name=name) for name in data.keys() - makes.keys()])
+        stats['makes_created'] = len(data.keys() - makes.keys())
+        if prune and makes.keys() - data.keys():
+            stats['makes_deleted'] = VehicleMake.objects.filter(
+                id__in=[makes[name] for name in makes.keys() - data.keys()]
+            ).delete()[1].get(VehicleMake._meta.label, 0)
+        makes = dict(VehicleMake.objects.filter(name__in=data.keys()).values_list('name', 'id'))
+
+        wanted_models = {}
+        for make_name, models in data.items():
+            for model_name, info in models.items():
+                year_from, year_to = info.get('years') or (None, None)
+                wanted_models[(makes[make_name], model_name)] = (year_from, year_to)
+        models = {
+            (make_id, name): (pk, year_from, year_to)
+            for pk, make_id, name, year_from, year_to in VehicleModel.objects.filter(
+                make_id__in=makes.values()
+            ).values_list('id', 'make_id', 'name', 'year_from', 'year_to')
+        }
+        VehicleModel.objects.bulk_create([
+            VehicleModel(make_id=make_id, name=name, year_from=years[0], year_to=years[1])
+            for (make_id, name), years in wanted_models.items() if (make_id, name) not in models
+        ])
+        stats['models_created'] = len(wanted_models.keys() - models.keys())
+        changed = [
+            VehicleModel(id=models[key][0], year_from=years[0], year_to=years[1])
+            for key, years in wanted_models.items() if key in models and models[key][1:] != years
+        ]
+        VehicleModel.objects.bulk_update(changed, ['year_from', 'year_to'])
+        stats['models_updated'] = len(changed)
+        if prune and models.keys() - wanted_models.keys():
+            stats['models_deleted'] = VehicleModel.objects.filter(
+                id__in=[models[key][0] for key in models.keys() - wanted_models.keys()]
+            ).delete()[1].get(VehicleModel._meta.label, 0)
+        models = {
+            (make_id, name): pk
+            for pk, make_id, name in VehicleModel.objects.filter(
+                make_id__in=makes.values()
+            ).values_list('id', 'make_id', 'name')
+        }
+
+        wanted_engines = {
+            (models[(makes[make_name], model_name)], engine)
+            for make_name, make_models in data.items()
+            for model_name, info in make_models.items()
+            for engine in info.get('engines', [])
+        }
+        engines = {
+            (model_id, name): pk
+            for pk, model_id, name in VehicleEngine.objects.filter(
+                model_id__in=models.values()
+            ).values_list('id', 'model_id', 'name')
+        }
+        VehicleEngine.objects.bulk_create([
+            VehicleEngine(model_id=model_id, name=name) for model_id, name in wanted_engines - engines.keys()
+        ])
+        stats['engines_created'] = len(wanted_engines - engines.keys())
+        if prune and engines.keys() - wanted_engines:
+            stats['engines_deleted'] = VehicleEngine.objects.filter(
+                id__in=[engines[key] for key in engines.keys() - wanted_engines]
+            ).delete()[0]
+
+        # Bulk writes bypass the post_save receivers
+        if any(stats.values()):
+            bump_taxonomy_version()
+    return stats
@@ -1,3 +1,685 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+import zipfile
+from io import BytesIO, StringIO
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from bids.models import Bid
+from core.models import User
+from .cs import cache_pdf, cs_generation
+from .images import ingest_image, record_ingestion
+from .models import (
+    RFQ, RFQItem, RFQItemImage, VehicleMake, VehicleModel, VehicleEngine, PartCatalog, PartCrossReference,
+)
+from .lookup import clear_local, part_ids
+from .search import compatibility_q, search_parts
+from .taxonomy import bump_taxonomy_version, sync_vehicle_taxonomy, taxonomy_version
+
+
+class RFQReadQueryCountTests(TestCase):
+    """Feed and list pages must cost a constant number of queries."""
+
+    def setUp(self):
+        self.workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        self.vendor = User.objects.create(username='vendor', role=User.Role.VENDOR)
+        self.other_vendor = User.objects.create(username='other', role=User.Role.VENDOR)
+        self.client = APIClient()
+        self.client.force_authenticate(self.vendor)
+
+    def create_rfqs(self, count, items_per_rfq=3):
+        for _ in range(count):
+            rfq = RFQ.objects.create(workshop=self.workshop, make='Toyota', model='Axio',
+                                     status=RFQ.Status.BIDDING_OPEN)
+            for i in range(items_per_rfq):
+                item = RFQItem.objects.create(rfq=rfq, name=f'Part {i}')
+                Bid.objects.create(rfq_item=item, vendor=self.vendor, amount=Decimal('100'),
+                                   part_category=Bid.Category.OEM)
+                Bid.objects.create(rfq_item=item, vendor=self.other_vendor, amount=Decimal('90'),
+                                   part_category=Bid.Category.OEM, status=Bid.Status.ACCEPTED)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.data
+
+    def test_feed_query_count_is_constant(self):
+        self.create_rfqs(2)
+        small, _ = self.count_queries('/api/v1/feed/')
+        self.create_rfqs(8)
+        with self.assertNumQueries(small):
+            response = self.client.get('/api/v1/feed/')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_vendor_rfq_list_query_count_is_constant(self):
+        self.create_rfqs(2)
+        small, _ = self.count_queries('/api/v1/rfqs/')
+        self.create_rfqs(8)
+        large, data = self.count_queries('/api/v1/rfqs/')
+        self.assertEqual(small, large)
+
+        rfq = data[0]
+        self.assertEqual(rfq['item_count'], 3)
+        item = rfq['items'][0]
+        self.assertEqual(item['my_bid']['vendor_name'], 'vendor')
+        accepted = Bid.objects.get(rfq_item_id=item['id'], status=Bid.Status.ACCEPTED)
+        self.assertEqual(item['winning_bid_id'], accepted.id)
+
+
+class AwardOrderTests(TestCase):
+    """Awards are set-based and can't be applied twice."""
+
+    def setUp(self):
+        self.workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        self.vendors = [User.objects.create(username=f'vendor{i}', role=User.Role.VENDOR) for i in range(2)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.workshop)
+
+    def create_rfq(self, items):
+        rfq = RFQ.objects.create(workshop=self.workshop, status=RFQ.Status.BIDDING_OPEN)
+        bids = []
+        for i in range(items):
+            item = RFQItem.objects.create(rfq=rfq, name=f'Part {i}')
+            bids.append([
+                Bid.objects.create(rfq_item=item, vendor=vendor, amount=Decimal(100 + n),
+                                   part_category=Bid.Category.OEM)
+                for n, vendor in enumerate(self.vendors)
+            ])
+        return rfq, bids
+
+    def award(self, rfq, bid_ids):
+        return self.client.post(f'/api/v1/rfqs/{rfq.id}/award_order/', {'bid_ids': bid_ids}, format='json')
+
+    def test_award_query_count_is_constant(self):
+        counts = []
+        for items in (2, 10):
+            rfq, bids = self.create_rfq(items)
+            winners = [item_bids[i % 2].id for i, item_bids in enumerate(bids)]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.award(rfq, winners)
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data['order_ids']), 2)
+            counts.append(len(ctx))
+
+            rfq.refresh_from_db()
+            self.assertEqual(rfq.status, RFQ.Status.COMPLETED)
+            self.assertEqual(Bid.objects.filter(id__in=winners, status=Bid.Status.ACCEPTED).count(), items)
+            self.assertEqual(Bid.objects.filter(rfq_item__rfq=rfq, status=Bid.Status.REJECTED).count(), items)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_item_cannot_be_awarded_twice(self):
+        rfq, bids = self.create_rfq(2)
+        self.assertEqual(self.award(rfq, [bids[0][0].id]).status_code, 201)
+        rfq.refresh_from_db()
+        self.assertEqual(rfq.status, RFQ.Status.BIDDING_OPEN)
+
+        self.assertEqual(self.award(rfq, [bids[0][0].id]).status_code, 400)
+        self.assertEqual(self.award(rfq, [bids[0][1].id]).status_code, 400)
+        self.assertEqual(self.award(rfq, [bids[1][0].id, bids[1][1].id]).status_code, 400)
+        self.assertEqual(rfq.orders.count(), 1)
+
+
+class CSMatrixTests(TestCase):
+    """The comparative statement costs the same number of queries at any size."""
+
+    def setUp(self):
+        cache.clear()
+        self.workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        self.client = APIClient()
+        self.client.force_authenticate(self.workshop)
+
+    def create_rfq(self, items, vendors):
+        rfq = RFQ.objects.create(workshop=self.workshop, status=RFQ.Status.BIDDING_OPEN)
+        vendors = [User.objects.create(username=f'v{rfq.id}-{i}', role=User.Role.VENDOR) for i in range(vendors)]
+        for i in range(items):
+            item = RFQItem.objects.create(rfq=rfq, name=f'Part {i}')
+            for n, vendor in enumerate(vendors):
+                for amount in (200 + n, 100 + n):
+                    Bid.objects.create(rfq_item=item, vendor=vendor, amount=Decimal(amount),
+                                       part_category=Bid.Category.OEM)
+        return rfq
+
+    def test_cs_endpoint(self):
+        counts = []
+        for items, vendors in ((2, 2), (6, 5)):
+            rfq = self.create_rfq(items, vendors)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(f'/api/v1/rfqs/{rfq.id}/cs/')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(ctx))
+
+        self.assertEqual(counts[0], counts[1])
+        data = response.data
+        self.assertEqual(len(data['vendors']), 5)
+        first = data['items'][0]
+        # Each cell is the vendor's cheapest bid; the first vendor is cheapest overall
+        self.assertEqual([cell['amount'] for cell in first['cells']], [Decimal(100 + n) for n in range(5)])
+        self.assertEqual([cell['is_lowest'] for cell in first['cells']], [True] + [False] * 4)
+        self.assertEqual(data['vendors'][0]['total'], Decimal(600))
+
+    def test_cs_refused_to_vendors(self):
+        rfq = self.create_rfq(1, 2)
+        vendor = User.objects.create(username='competitor', role=User.Role.VENDOR)
+        self.client.force_authenticate(vendor)
+        self.assertEqual(self.client.get(f'/api/v1/rfqs/{rfq.id}/cs/').status_code, 403)
+        self.assertEqual(self.client.get(f'/api/v1/rfqs/{rfq.id}/pdf/').status_code, 403)
+
+    @override_settings(BID_BROADCAST_ASYNC=False)
+    def test_pdf_rendered_during_a_write_is_not_served(self):
+        rfq = self.create_rfq(1, 1)
+        # A render starts, a bid commits, then the render stores its now-stale PDF
+        generation = cs_generation(rfq.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Bid.objects.create(rfq_item=rfq.items.first(), vendor=User.objects.filter(role=User.Role.VENDOR).first(),
+                               amount=Decimal('1'), part_category=Bid.Category.OEM)
+        cache_pdf(rfq.id, generation, '"stale"', b'stale')
+
+        response = self.client.get(f'/api/v1/rfqs/{rfq.id}/pdf/')
+        self.assertNotEqual(response['ETag'], '"stale"')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_pdf_renders_from_matrix(self):
+        rfq = self.create_rfq(2, 2)
+        response = self.client.get(f'/api/v1/rfqs/{rfq.id}/pdf/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    @override_settings(BID_BROADCAST_ASYNC=False)
+    def test_pdf_is_cached_and_revalidated(self):
+        rfq = self.create_rfq(2, 2)
+        url = f'/api/v1/rfqs/{rfq.id}/pdf/'
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.get(url)
+        etag = first['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url).content, first.content)
+
+        item = rfq.items.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Bid.objects.create(rfq_item=item, vendor=User.objects.filter(role=User.Role.VENDOR).first(),
+                               amount=Decimal('1'), part_category=Bid.Category.OEM)
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_pdf_job_renders_in_background(self):
+        rfq = self.create_rfq(2, 2)
+        stranger = User.objects.create(username='other-workshop', role=User.Role.WORKSHOP)
+        with tempfile.TemporaryDirectory() as root, override_settings(PDF_EXPORT_ROOT=root):
+            response = self.client.post(f'/api/v1/rfqs/{rfq.id}/pdf/jobs/', {'mode': 'POST_AWARD'}, format='json')
+            self.assertEqual(response.status_code, 202)
+            job_url = f"/api/v1/pdf-jobs/{response.data['job_id']}/"
+
+            deadline = time.monotonic() + 60
+            while response.data['status'] == 'PENDING' and time.monotonic() < deadline:
+                time.sleep(0.1)
+                response = self.client.get(job_url)
+            self.assertEqual(response.data['status'], 'DONE')
+
+            download = self.client.get(job_url + 'download/')
+            self.assertEqual(download.status_code, 200)
+            self.assertTrue(b''.join(download.streaming_content).startswith(b'%PDF'))
+            download.close()
+
+            self.client.force_authenticate(stranger)
+            self.assertEqual(self.client.get(job_url).status_code, 404)
+            self.assertEqual(self.client.post(f'/api/v1/rfqs/{rfq.id}/pdf/jobs/').status_code, 403)
+
+    def test_bulk_export_streams_zip_of_own_completed_rfqs(self):
+        rfqs = [self.create_rfq(2, 2) for _ in range(3)]
+        RFQ.objects.filter(id__in=[rfq.id for rfq in rfqs[:2]]).update(status=RFQ.Status.COMPLETED)
+        other = RFQ.objects.create(workshop=User.objects.create(username='other-workshop'),
+                                   status=RFQ.Status.COMPLETED)
+
+        today = other.updated_at.date().isoformat()
+        response = self.client.get(f'/api/v1/reports/cs-export/?from={today}&to={today}')
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [f'cs_rfq_{rfq.id}.pdf' for rfq in rfqs[:2]])
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF'))
+
+        self.client.force_authenticate(User.objects.filter(role=User.Role.VENDOR).first())
+        self.assertEqual(self.client.get(f'/api/v1/reports/cs-export/?from={today}&to={today}').status_code, 403)
+
+
+class VendorRFQVisibilityTests(TestCase):
+    """Vendors see open RFQs plus closed ones they bid on, once each."""
+
+    def test_vendor_queryset(self):
+        workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        vendor = User.objects.create(username='vendor', role=User.Role.VENDOR)
+        open_rfq = RFQ.objects.create(workshop=workshop, status=RFQ.Status.BIDDING_OPEN)
+        bid_on = RFQ.objects.create(workshop=workshop, status=RFQ.Status.COMPLETED)
+        RFQ.objects.create(workshop=workshop, status=RFQ.Status.COMPLETED)
+        RFQ.objects.create(workshop=workshop, status=RFQ.Status.DRAFT)
+        for rfq in (open_rfq, bid_on):
+            for i in range(2):
+                item = RFQItem.objects.create(rfq=rfq, name=f'Part {i}')
+                Bid.objects.create(rfq_item=item, vendor=vendor, amount=Decimal('10'),
+                                   part_category=Bid.Category.OEM)
+
+        client = APIClient()
+        client.force_authenticate(vendor)
+        response = client.get('/api/v1/rfqs/')
+        self.assertEqual([rfq['id'] for rfq in response.data], [bid_on.id, open_rfq.id])
+
+
+class BidCounterTests(TestCase):
+    """Maintained bid summaries match a full recompute."""
+
+    def test_counters_follow_bids(self):
+        workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        vendors = [User.objects.create(username=f'vendor{i}', role=User.Role.VENDOR) for i in range(2)]
+        rfq = RFQ.objects.create(workshop=workshop, status=RFQ.Status.BIDDING_OPEN)
+        items = [RFQItem.objects.create(rfq=rfq, name=f'Part {i}') for i in range(2)]
+
+        bids = [
+            Bid.objects.create(rfq_item=items[0], vendor=vendors[0], amount=Decimal('300'), part_category=Bid.Category.OEM),
+            Bid.objects.create(rfq_item=items[0], vendor=vendors[0], amount=Decimal('250'), part_category=Bid.Category.OEM),
+            Bid.objects.create(rfq_item=items[0], vendor=vendors[1], amount=Decimal('280'), part_category=Bid.Category.OEM),
+            Bid.objects.create(rfq_item=items[1], vendor=vendors[1], amount=Decimal('90'), part_category=Bid.Category.OEM),
+        ]
+        item = RFQItem.objects.get(pk=items[0].pk)
+        self.assertEqual((item.bid_count, item.vendor_count, item.min_amount), (3, 2, Decimal('250')))
+        rfq.refresh_from_db()
+        self.assertEqual((rfq.bid_count, rfq.vendor_count), (4, 2))
+
+        bids[2].status = Bid.Status.ACCEPTED
+        bids[2].save()
+        item.refresh_from_db()
+        self.assertEqual(item.accepted_bid_id, bids[2].id)
+
+        bids[1].delete()
+        bids[0].amount = Decimal('200')
+        bids[0].save()
+        item.refresh_from_db()
+        self.assertEqual((item.bid_count, item.vendor_count, item.min_amount), (2, 2, Decimal('200')))
+
+        bids[2].status = Bid.Status.REJECTED
+        bids[2].save()
+        item.refresh_from_db()
+        self.assertIsNone(item.accepted_bid_id)
+
+
+def image_upload(name='photo.jpg', size=(64, 48)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class RFQCreateTests(TestCase):
+    """Items are inserted in bulk; photos can ride along in the same multipart request."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.workshop = User.objects.create(username='workshop', role=User.Role.WORKSHOP)
+        self.client = APIClient()
+        self.client.force_authenticate(self.workshop)
+
+    def test_multipart_create_with_item_images(self):
+        items = [{'name': f'Part {i}', 'quantity': 1} for i in range(20)]
+        response = self.client.post('/api/v1/rfqs/', {
+            'make': 'Toyota',
+            'items': json.dumps(items),
+            'items[0][images]': [image_upload('a.jpg'), image_upload('b.jpg')],
+            'items[2][images]': image_upload('c.jpg'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+
+        rfq = RFQ.objects.get(pk=response.data['id'])
+        self.assertEqual(rfq.items.count(), 20)
+        first, _, third = rfq.items.order_by('id')[:3]
+        self.assertEqual(first.images.count(), 2)
+        self.assertEqual(third.images.count(), 1)
+
+        bad = self.client.post('/api/v1/rfqs/', {
+            'items': json.dumps(items[:1]),
+            'items[5][images]': image_upload(),
+        }, format='multipart')
+        self.assertEqual(bad.status_code, 400)
+        bad = self.client.post('/api/v1/rfqs/', {
+            'items': json.dumps(items[:1]),
+            'items[0][images]': SimpleUploadedFile('x.jpg', b'not an image', content_type='image/jpeg'),
+        }, format='multipart')
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(RFQ.objects.count(), 1)
+
+    def test_item_image_upload(self):
+        rfq = RFQ.objects.create(workshop=self.workshop)
+        item = RFQItem.objects.create(rfq=rfq, name='Mirror')
+        response = self.client.post(f'/api/v1/rfq-items/{item.id}/images/',
+                                    {'images': [image_upload()]}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(item.images.count(), 1)
+
+        not_an_image = SimpleUploadedFile('x.jpg', b'not an image', content_type='image/jpeg')
+        response = self.client.post(f'/api/v1/rfq-items/{item.id}/images/',
+                                    {'images': [not_an_image]}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_ingestion_encodes_thumbnails_and_dedups(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees
+        exif[0x010F] = 'PhoneMaker'
+        upload = f'{self.media.name}/upload.jpg'
+        Image.new('RGB', (4000, 1000)).save(upload, exif=exif)
+
+        result = ingest_image(upload, self.media.name)
+        self.assertEqual((result['width'], result['height']), (512, 2048))
+        with Image.open(f"{self.media.name}/{result['image']}") as image:
+            self.assertEqual(image.size, (512, 2048))
+            self.assertFalse(image.getexif())
+        with Image.open(f"{self.media.name}/{result['thumbnails']['160']}") as thumbnail:
+            self.assertEqual(thumbnail.size, (40, 160))
+
+        copy = f'{self.media.name}/copy.jpg'
+        with open(upload, 'rb') as src, open(copy, 'wb') as dst:
+            dst.write(src.read())
+        self.assertEqual(ingest_image(copy, self.media.name), result)
+
+        rfq = RFQ.objects.create(workshop=self.workshop)
+        item = RFQItem.objects.create(rfq=rfq, name='Mirror')
+        row = RFQItemImage.objects.create(item=item, image='upload.jpg')
+        record_ingestion(row.id, upload, 1, result)
+        self.assertFalse(os.path.exists(upload))
+
+        data = self.client.get(f'/api/v1/rfqs/{rfq.id}/').data['items'][0]['images'][0]
+        self.assertEqual(data['status'], 'READY')
+        self.assertTrue(data['image'].endswith(result['image']))
+        self.assertTrue(data['thumbnails']['480'].endswith(result['thumbnails']['480']))
+
+
+class VehicleBundleTests(TestCase):
+    """The taxonomy bundle is cached, revalidatable and refreshed when vehicles change."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bundle(self):
+        make = VehicleMake.objects.create(name='Toyota')
+        model = VehicleModel.objects.create(make=make, name='Axio', year_from=2012, year_to=2012)
+        VehicleEngine.objects.create(model=model, name='1NZ-FE')
+
+        client = APIClient()
+        with self.assertNumQueries(4):
+            response = client.get('/api/v1/vehicles/bundle/')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(data['makes'][0]['models'][0]['year_to'], 2012)
+        self.assertEqual(data['makes'][0]['models'][0]['engines'][0]['name'], '1NZ-FE')
+        self.assertIn('max-age', response['Cache-Control'])
+
+        etag = response['ETag']
+        # Only the version row is read
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get('/api/v1/vehicles/bundle/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        versioned = client.get(f"/api/v1/vehicles/bundle/?v={data['version']}")
+        self.assertIn('immutable', versioned['Cache-Control'])
+
+        # A new version changes the body, so the ETag must change with it
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_taxonomy_version()
+        bumped = client.get('/api/v1/vehicles/bundle/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(bumped.status_code, 200)
+        self.assertNotEqual(bumped['ETag'], etag)
+        self.assertEqual(json.loads(bumped.content)['version'], data['version'] + 1)
+        etag = bumped['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            model.year_to = 2013
+            model.save()
+        response = client.get('/api/v1/vehicles/bundle/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['makes'][0]['models'][0]['year_to'], 2013)
+
+    def test_years_from_range(self):
+        make = VehicleMake.objects.create(name='Toyota')
+        model = VehicleModel.objects.create(make=make, name='Axio', year_from=2012, year_to=2014)
+        response = APIClient().get(f'/api/v1/vehicles/years/?model={model.id}')
+        self.assertEqual([row['year'] for row in response.data], [2014, 2013, 2012])
+        self.assertTrue(model.covers_year(2013))
+        self.assertFalse(model.covers_year(2015))
+
+
+class CatalogImportTests(TestCase):
+    """import_catalog upserts by normalized number and only writes what changed."""
+
+    def setUp(self):
+        cache.clear()
+        clear_local()
+        make = VehicleMake.objects.create(name='Toyota')
+        VehicleModel.objects.create(make=make, name='Axio')
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def run_import(self, lines):
+        path = os.path.join(self.dir.name, 'feed.jsonl')
+        with open(path, 'w') as f:
+            f.write('\n'.join(json.dumps(line) for line in lines))
+        out = StringIO()
+        call_command('import_catalog', path, stdout=out)
+        return out.getvalue()
+
+    def test_import_is_idempotent(self):
+        feed = [
+            {'part_number': '04465-02280', 'part_name': 'Front Brake Pad Set', 'make': 'toyota',
+             'model': 'Axio', 'year_from': 2012, 'year_to': 2020, 'alternative_numbers': '04465-12345'},
+            {'part_number': '90915-YZZF2', 'part_name': 'Oil Filter', 'make': 'Toyota',
+             'superseded_numbers': 90915},
+            {'part_number': '11111', 'part_name': 'Unknown', 'make': 'Lada'},
+            # JSONL cells can be null or numeric
+            {'part_number': 17801, 'part_name': 'Air Filter', 'make': None, 'model': 2020,
+             'alternative_numbers': [None, 17802]},
+        ]
+        output = self.run_import(feed)
+        self.assertIn('3 created, 0 updated, 0 unchanged, 1 skipped; 3 cross-references added', output)
+        part = PartCatalog.objects.get(part_number_normalized='0446502280')
+        self.assertEqual(part.model.name, 'Axio')
+        self.assertEqual(list(search_parts('0446512')), [part])
+
+        output = self.run_import(feed)
+        self.assertIn('0 created, 0 updated, 3 unchanged', output)
+
+        feed[0]['part_number'] = '0446502280'
+        feed[0]['part_name'] = 'Brake Pad Kit'
+        feed[0]['superseded_numbers'] = ['04465-99999']
+        output = self.run_import(feed)
+        self.assertIn('0 created, 1 updated, 2 unchanged', output)
+        self.assertEqual(PartCatalog.objects.count(), 3)
+        self.assertEqual(list(search_parts('Brake Pad Kit')), [PartCatalog.objects.get(pk=part.pk)])
+        self.assertEqual(
+            PartCrossReference.objects.get(number_normalized='0446599999').kind,
+            PartCrossReference.Kind.SUPERSEDED,
+        )
+
+        # Numbers the feed no longer lists stop resolving
+        self.assertEqual(part_ids('04465-12345'), (part.pk,))
+        del feed[0]['alternative_numbers']
+        self.assertIn('0 cross-references added, 0 removed', self.run_import(feed))
+        feed[0]['alternative_numbers'] = ''
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIn('0 cross-references added, 1 removed', self.run_import(feed))
+        self.assertEqual(part_ids('04465-12345'), ())
+        self.assertEqual(list(search_parts('0446512')), [])
+
+
+class TaxonomySyncTests(TestCase):
+    """sync_vehicle_taxonomy applies differences only and keeps ids stable."""
+
+    def test_sync_keeps_ids(self):
+        data = {'Toyota': {'Axio': {'years': [2012, 2018], 'engines': ['1NZ-FE', '2NZ-FE']}}}
+        stats = sync_vehicle_taxonomy(data)
+        self.assertEqual((stats['makes_created'], stats['models_created'], stats['engines_created']), (1, 1, 2))
+        model = VehicleModel.objects.get(name='Axio')
+        part = PartCatalog.objects.create(part_number='04465-02280', part_name='Brake Pad',
+                                          make=model.make, model=model)
+
+        self.assertFalse(any(sync_vehicle_taxonomy(data).values()))
+
+        version = taxonomy_version()
+        data['Toyota']['Axio'] = {'years': [2012, 2020], 'engines': ['1NZ-FE', '1NZ-FXE']}
+        data['Honda'] = {'Fit (GE)': {'years': [2007, 2013], 'engines': ['L13A']}}
+        with self.captureOnCommitCallbacks(execute=True):
+            stats = sync_vehicle_taxonomy(data)
+        self.assertEqual(stats['models_updated'], 1)
+        self.assertEqual((stats['engines_created'], stats['engines_deleted']), (2, 1))
+        self.assertGreater(taxonomy_version(), version)
+        # The version lives in the database, so a cold or per-process cache agrees on it
+        version = taxonomy_version()
+        cache.clear()
+        self.assertEqual(taxonomy_version(), version)
+
+        model.refresh_from_db()
+        part.refresh_from_db()
+        self.assertEqual((model.year_from, model.year_to), (2012, 2020))
+        self.assertEqual(part.model_id, model.id)
+        self.assertEqual(
+            sorted(model.engines.values_list('name', flat=True)), ['1NZ-FE', '1NZ-FXE']
+        )
+
+        del data['Honda']
+        self.assertEqual(sync_vehicle_taxonomy(data)['makes_deleted'], 1)
+        self.assertFalse(VehicleModel.objects.filter(name='Fit (GE)').exists())
+
+
+class PartLookupCacheTests(TestCase):
+    """Exact part-number lookups are cached, misses included, and catalog writes invalidate them."""
+
+    def setUp(self):
+        cache.clear()
+        clear_local()
+        self.part = PartCatalog.objects.create(part_number='90915-YZZF2', part_name='Oil Filter')
+
+    def test_lookup_and_invalidation(self):
+        self.assertEqual(part_ids('90915 yzzf2'), (self.part.id,))
+        self.assertEqual(part_ids('04465-02280'), ())
+        with self.assertNumQueries(0):
+            self.assertEqual(part_ids('9091-5YZZF2'), (self.part.id,))
+            self.assertEqual(part_ids('0446502280'), ())
+            response = APIClient().get('/api/v1/parts/lookup/?part_number=04465-02280')
+        self.assertEqual(response.data, [])
+
+        # A new entry and a cross-reference replace the cached miss
+        with self.captureOnCommitCallbacks(execute=True):
+            pads = PartCatalog.objects.create(part_number='04465-02280', part_name='Brake Pads')
+        with self.captureOnCommitCallbacks(execute=True):
+            PartCrossReference.objects.create(part=self.part, number='04465-02280')
+        self.assertEqual(part_ids('04465-02280'), (pads.id, self.part.id))
+
+        response = APIClient().get('/api/v1/parts/search/?q=0446502280')
+        self.assertEqual(sorted(row['id'] for row in response.data), sorted([pads.id, self.part.id]))
+        # Still the comma-separated string clients have always received
+        alternatives = {row['id']: row['alternative_numbers'] for row in response.data}
+        self.assertEqual(alternatives, {pads.id: '', self.part.id: '04465-02280'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pads.delete()
+        self.assertEqual(part_ids('04465-02280'), (self.part.id,))
+
+    def test_search_ranks_exact_hits_first(self):
+        short = PartCatalog.objects.create(part_number='04465', part_name='Pad Clip')
+        long = PartCatalog.objects.create(part_number='04465-02280', part_name='Brake Pads')
+        response = APIClient().get('/api/v1/parts/search/?q=04465')
+        self.assertEqual([row['id'] for row in response.data], [short.id, long.id])
+
+        # Two characters: number prefixes first, then a bounded name scan
+        o2 = PartCatalog.objects.create(part_number='89465-42190', part_name='O2 Sensor')
+        self.assertEqual([row['id'] for row in APIClient().get('/api/v1/parts/search/?q=o2').data], [o2.id])
+        self.assertEqual([row['id'] for row in APIClient().get('/api/v1/parts/search/?q=04').data], [short.id, long.id])
+        with patch('rfqs.search.SHORT_NAME_LIMIT', 1):
+            PartCatalog.objects.create(part_number='89467-42010', part_name='O2 Sensor (rear)')
+            self.assertEqual(len(APIClient().get('/api/v1/parts/search/?q=o2').data), 1)
+
+        # Partial input is never remembered as a miss
+        APIClient().get('/api/v1/parts/search/?q=0446')
+        self.assertIsNone(cache.get('parts:lookup:0446'))
+        self.assertEqual(part_ids('0446', cache_misses=False), ())
+        with self.captureOnCommitCallbacks(execute=True):
+            clip = PartCatalog.objects.create(part_number='0446', part_name='Shim')
+        self.assertEqual(part_ids('0446'), (clip.id,))
+
+    def test_rfq_items_link_catalog_entry(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='workshop', role=User.Role.WORKSHOP))
+        response = client.post('/api/v1/rfqs/', {'make': 'Toyota', 'items': [
+            {'name': 'Oil filter', 'part_number': '90915yzzf2'},
+            {'name': 'Mystery part', 'part_number': 'XX-1'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        items = RFQ.objects.get(pk=response.data['id']).items.order_by('id')
+        self.assertEqual([item.catalog_part_id for item in items], [self.part.id, None])
+
+
+class PartSearchCompatibilityTests(TestCase):
+    """With a vehicle, search ranks (or keeps only) parts that fit it, using the same rules as the model."""
+
+    def setUp(self):
+        self.toyota = VehicleMake.objects.create(name='Toyota')
+        self.honda = VehicleMake.objects.create(name='Honda')
+        self.corolla = VehicleModel.objects.create(make=self.toyota, name='Corolla')
+        self.yaris = VehicleModel.objects.create(make=self.toyota, name='Yaris')
+
+    def search(self, **params):
+        params = {'q': 'BP1', 'vehicle_make': self.toyota.id, 'vehicle_model': self.corolla.id,
+                  'vehicle_year': 2018, **params}
+        return [row['part_number'] for row in APIClient().get('/api/v1/parts/search/', params).data]
+
+    def test_compatible_parts_rank_first(self):
+        # Prefix match (rank 0) that doesn't fit, substring match (rank 1) that does
+        PartCatalog.objects.create(part_number='BP-100', part_name='Brake Pads', make=self.honda)
+        PartCatalog.objects.create(part_number='XBP-100', part_name='Brake Pads', make=self.toyota,
+                                   model=self.corolla, year_from=2014, year_to=2019)
+        PartCatalog.objects.create(part_number='BP-150', part_name='Brake Pads')
+
+        self.assertEqual(self.search(), ['BP-150', 'XBP-100', 'BP-100'])
+        self.assertEqual(self.search(compatible_only='true'), ['BP-150', 'XBP-100'])
+        self.assertEqual(self.search(vehicle_year=2021, compatible_only='true'), ['BP-150'])
+        # Without a vehicle only match_rank orders
+        self.assertEqual(
+            [row['part_number'] for row in APIClient().get('/api/v1/parts/search/?q=BP1').data],
+            ['BP-100', 'BP-150', 'XBP-100'],
+        )
+
+    def test_compatibility_q_matches_is_compatible_with(self):
+        restrictions = [
+            {},
+            {'make': self.toyota},
+            {'make': self.honda},
+            {'model': self.corolla},
+            {'make': self.toyota, 'model': self.yaris},
+            {'make': self.toyota, 'year_from': 2015},
+            {'make': self.toyota, 'model': self.corolla, 'year_to': 2012},
+            {'make': self.toyota, 'model': self.corolla, 'year_from': 2010, 'year_to': 2020},
+        ]
+        parts = [PartCatalog.objects.create(part_number=f'P{i}', part_name='Part', **fields)
+                 for i, fields in enumerate(restrictions)]
+        vehicles = [
+            (make, model, year)
+            for make in (None, self.toyota.id, self.honda.id)
+            for model in (None, self.corolla.id, self.yaris.id)
+            for year in (None, 2005, 2011, 2018)
+        ]
+        for vehicle in vehicles:
+            with self.subTest(vehicle=vehicle):
+                self.assertEqual(
+                    set(PartCatalog.objects.filter(compatibility_q(*vehicle)).values_list('id', flat=True)),
+                    {part.id for part in parts if part.is_compatible_with(*vehicle)},
+                )
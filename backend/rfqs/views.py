@@ -1,8 +1,10 @@
-from rest_framework import viewsets, permissions, status
+from django.db import transaction
+from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from .models import RFQ, RFQItem
-from .serializers import RFQCreateSerializer, RFQReadSerializer, RFQItemSerializer, RFQItemStandaloneSerializer
+from .serializers import RFQCreateSerializer, RFQReadSerializer, RFQItemSerializer, RFQItemStandaloneSerializer, RFQItemImageSerializer, validate_image_upload
 
 class RFQViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -10,14 +12,20 @@ class RFQViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.role == 'WORKSHOP':
-            return RFQ.objects.filter(workshop=user).order_by('-created_at')
+            queryset = RFQ.objects.filter(workshop=user).order_by('-created_at')
         elif user.role == 'VENDOR':
-             # Vendors can see RFQs that are open for bidding OR RFQs they have bid on (even if closed)
-            from django.db.models import Q
-            return RFQ.objects.filter(
-                Q(status=RFQ.Status.BIDDING_OPEN) | Q(items__bids__vendor=user)
-            ).distinct().order_by('-created_at')
-        return RFQ.objects.none()
+            # Vendors can see RFQs that are open for bidding OR RFQs they have bid on (even if closed).
+            # A UNION of two index-only subqueries, instead of an OR across the bid join plus DISTINCT.
+            from bids.models import Bid
+            open_ids = RFQ.objects.filter(status=RFQ.Status.BIDDING_OPEN).values('id')
+            bid_on_ids = Bid.objects.filter(vendor=user).values('rfq_item__rfq_id')
+            queryset = RFQ.objects.filter(id__in=open_ids.union(bid_on_ids)).order_by('-created_at')
+        else:
+            return RFQ.objects.none()
+
+        if self.action in ['list', 'retrieve']:
+            queryset = RFQReadSerializer.setup_eager_loading(queryset, user)
+        return queryset
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -52,6 +60,10 @@ class RFQViewSet(viewsets.ModelViewSet):
             from .notifications import notify_vendors_of_update
             notify_vendors_of_update(rfq, ", ".join(changes))
 
+        if rfq.status == RFQ.Status.BIDDING_OPEN:
+            from bids.feed import index_rfq
+            index_rfq(rfq)
+
     def perform_destroy(self, instance):
         # Notify vendors of cancellation before deleting
         from .notifications import notify_vendors_of_update
@@ -64,65 +76,43 @@ class RFQViewSet(viewsets.ModelViewSet):
         if rfq.status == RFQ.Status.DRAFT:
             rfq.status = RFQ.Status.BIDDING_OPEN
             rfq.save()
+            # Fan the RFQ out to matching vendor feeds once, here, not on every feed read
+            from bids.feed import index_rfq
+            index_rfq(rfq)
             return Response({'status': 'BIDDING_OPEN'}, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get'])
+    def cs(self, request, pk=None):
+        """Comparative statement: each vendor's lowest bid per item, totals and lowest-price flags."""
+        from .cs import build_cs_matrix, can_export_cs
+        rfq = self.get_object()
+        # Vendors may see open RFQs, but never their competitors' prices
+        if not can_export_cs(request.user, rfq):
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(build_cs_matrix(rfq))
+
     @action(detail=True, methods=['post'])
     def award_order(self, request, pk=None):
         rfq = self.get_object()
+        if request.user != rfq.workshop:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
         
         # Payload: { "bid_ids": [1, 2] }
         bid_ids = request.data.get('bid_ids', [])
         if not bid_ids:
             return Response({'error': 'No bids selected'}, status=status.HTTP_400_BAD_REQUEST)
         
-        from bids.models import Bid
-        from orders.models import VendorOrder
+        from .awards import award_bids, AwardError
+        try:
+            orders = award_bids(rfq.pk, bid_ids)
+        except AwardError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        selected_bids = Bid.objects.filter(id__in=bid_ids, rfq_item__rfq=rfq)
-        
-        if not selected_bids.exists():
-            return Response({'error': 'Invalid bids'}, status=status.HTTP_400_BAD_REQUEST)
-            
-        # Group by Vendor
-        bids_by_vendor = {}
-        for bid in selected_bids:
-            if bid.vendor not in bids_by_vendor:
-                bids_by_vendor[bid.vendor] = []
-            bids_by_vendor[bid.vendor].append(bid)
-            
-        created_orders = []
-        
-        for vendor, bids in bids_by_vendor.items():
-            total = sum([bid.amount for bid in bids])
-            order = VendorOrder.objects.create(
-                rfq=rfq,
-                vendor=vendor,
-                total_amount=total,
-                status=VendorOrder.Status.PENDING_PAYMENT
-            )
-            order.bids.set(bids)
-            created_orders.append(order.id)
-            
-            # Update Bid status
-            for bid in bids:
-                bid.status = Bid.Status.ACCEPTED
-                bid.save()
-                
-        # Check if all items in the RFQ have an accepted bid
-        # If so, mark RFQ as COMPLETED
-        total_items = rfq.items.count()
-        # Count items that have at least one accepted bid
-        items_with_accepted_bids = rfq.items.filter(bids__status=Bid.Status.ACCEPTED).distinct().count()
+        rfq.refresh_from_db(fields=['status'])
+        from bids.feed import index_rfq
+        index_rfq(rfq)
         
-        if items_with_accepted_bids >= total_items:
-            rfq.status = RFQ.Status.COMPLETED
-        else:
-            # Stay open if partial
-            rfq.status = RFQ.Status.BIDDING_OPEN
-            
-        rfq.save()
-        
-        return Response({'message': 'Orders created', 'order_ids': created_orders}, status=status.HTTP_201_CREATED)
+        return Response({'message': 'Orders created', 'order_ids': [order.id for order in orders]}, status=status.HTTP_201_CREATED)
 
 class RFQItemViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -134,21 +124,64 @@ class RFQItemViewSet(viewsets.ModelViewSet):
         # RFQ ID must be in the body
         return super().create(request, *args, **kwargs)
 
+    def perform_create(self, serializer):
+        item = serializer.save()
+        # Item categories decide which vendor feeds an open RFQ belongs in
+        if item.rfq.status == RFQ.Status.BIDDING_OPEN:
+            from bids.feed import index_rfq
+            index_rfq(item.rfq)
+
+    def perform_update(self, serializer):
+        old_rfq = serializer.instance.rfq
+        item = serializer.save()
+        # A new category (or a move to another RFQ) changes which feeds the RFQs belong in
+        from bids.feed import index_rfq
+        for rfq in {old_rfq, item.rfq}:
+            if rfq.status == RFQ.Status.BIDDING_OPEN:
+                index_rfq(rfq)
+
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser])
+    def images(self, request, pk=None):
+        """Attach photos to an item: multipart, one or more files under `images`."""
+        item = self.get_object()
+        if request.user != item.rfq.workshop:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        uploads = request.FILES.getlist('images')
+        if not uploads:
+            return Response({'error': 'No images uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+        if item.images.count() + len(uploads) > RFQCreateSerializer.MAX_IMAGES_PER_ITEM:
+            return Response({'error': f'At most {RFQCreateSerializer.MAX_IMAGES_PER_ITEM} images per item'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            uploads = [validate_image_upload(upload) for upload in uploads]
+        except serializers.ValidationError as e:
+            return Response({'images': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        from .images import save_item_images
+        with transaction.atomic():
+            images = save_item_images([(item, upload) for upload in uploads])
+        return Response(RFQItemImageSerializer(images, many=True, context={'request': request}).data,
+                        status=status.HTTP_201_CREATED)
+
     def perform_destroy(self, instance):
         # Notify vendors of item removal
         rfq = instance.rfq
         from .notifications import notify_vendors_of_update
         notify_vendors_of_update(rfq, f"Item '{instance.name}' was removed from the request")
         instance.delete()
+        if rfq.status == RFQ.Status.BIDDING_OPEN:
+            from bids.feed import index_rfq
+            index_rfq(rfq)
 
-from .models import VehicleMake, VehicleModel, VehicleYear, VehicleEngine
-from .serializers import VehicleMakeSerializer, VehicleModelSerializer, VehicleYearSerializer, VehicleEngineSerializer
+from .models import VehicleMake, VehicleModel, VehicleEngine
+from .serializers import VehicleMakeSerializer, VehicleModelSerializer, VehicleEngineSerializer
 
 class VehicleViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API for retrieving static vehicle data.
     Default list returns all makes.
     Custom actions: /vehicles/models/?make=<id>, /vehicles/years/?model=<id>, /vehicles/engines/?model=<id>
+    Everything at once, for offline pickers: /vehicles/bundle/
     """
     permission_classes = [permissions.AllowAny]
     queryset = VehicleMake.objects.all()
@@ -167,6 +200,31 @@ class VehicleViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = VehicleMakeSerializer(makes, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='bundle')
+    def bundle(self, request):
+        """
+        The whole taxonomy (make -> models -> year range/engines) in one cacheable response.
+        Clients keep it offline and revalidate with If-None-Match; requesting
+        ?v=<version> for the current version is cacheable for good.
+        """
+        from django.http import HttpResponse
+        from django.utils.cache import get_conditional_response, patch_cache_control
+        from django.utils.http import quote_etag
+        from .taxonomy import get_bundle
+
+        version, etag, body = get_bundle()
+        etag = quote_etag(etag)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['X-Taxonomy-Version'] = str(version)
+        if request.query_params.get('v') == str(version):
+            patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=24 * 60 * 60)
+        return response
+
     @action(detail=False, methods=['get'], url_path='models')
     def models(self, request):
         """Get models for a specific make"""
@@ -183,9 +241,13 @@ class VehicleViewSet(viewsets.ReadOnlyModelViewSet):
         model_id = request.query_params.get('model')
         if not model_id:
             return Response({'error': 'model parameter is required'}, status=400)
-        years_list = VehicleYear.objects.filter(model_id=model_id)
-        serializer = VehicleYearSerializer(years_list, many=True)
-        return Response(serializer.data)
+        vehicle_model = VehicleModel.objects.filter(pk=model_id).only('year_from', 'year_to').first()
+        if not vehicle_model:
+            return Response([])
+        # Expanded from the model's year range; `id` kept for clients that key lists by it
+        return Response([
+            {'id': year, 'year': year, 'model': vehicle_model.id} for year in vehicle_model.years
+        ])
 
     @action(detail=False, methods=['get'], url_path='engines')
     def engines(self, request):
@@ -199,7 +261,8 @@ class VehicleViewSet(viewsets.ReadOnlyModelViewSet):
 
 from .models import PartCatalog
 from .serializers import PartCatalogSerializer
-from django.db.models import Q
+from .search import search_parts, vehicle_from_params, with_compatibility, SEARCH_LIMIT
+from .lookup import part_ids
 
 class PartCatalogViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -207,7 +270,7 @@ class PartCatalogViewSet(viewsets.ReadOnlyModelViewSet):
     Supports fuzzy search and vehicle compatibility checking.
     """
     permission_classes = [permissions.AllowAny]
-    queryset = PartCatalog.objects.all()
+    queryset = PartCatalog.objects.select_related('make', 'model').prefetch_related('cross_references')
     serializer_class = PartCatalogSerializer
     
     @action(detail=False, methods=['get'], url_path='search')
@@ -215,36 +278,34 @@ class PartCatalogViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Search parts by part number or name.
         Intelligent search: removes hyphens and special chars for matching.
+        Part number prefixes rank first, then part number substrings, then names.
         Query params:
         - q: search query (part number or name)
         - vehicle_make: make ID for compatibility check
         - vehicle_model: model ID for compatibility check  
         - vehicle_year: year for compatibility check
+        - compatible_only: "true" to drop parts that don't fit the vehicle
+        When a vehicle is given, compatible parts are ranked first in the database.
+        Entries whose part number is exactly the query rank above everything else.
         """
         query = request.query_params.get('q', '').strip()
         
         if not query or len(query) < 2:
             return Response([])
         
-        # Normalize query for intelligent matching
-        normalized_query = query.replace('-', '').replace(' ', '').upper()
+        # Prefix / trigram lookups on the normalized part number, never a full scan.
+        # Partial input is not cached as a miss, only used to rank exact hits first.
+        results = search_parts(
+            query,
+            PartCatalog.objects.select_related('make', 'model').prefetch_related('cross_references'),
+            exact_ids=part_ids(query, cache_misses=False),
+        )
         
-        # Get all parts and filter in Python for normalized matching
-        all_parts = PartCatalog.objects.select_related('make', 'model').all()
-        
-        results = []
-        for part in all_parts:
-            # Normalize part number for comparison
-            normalized_part_num = part.part_number.replace('-', '').replace(' ', '').upper()
-            
-            # Check if query matches
-            if (normalized_query in normalized_part_num or
-                query.lower() in part.part_name.lower() or
-                (part.alternative_numbers and query in part.alternative_numbers)):
-                results.append(part)
-                
-                if len(results) >= 10:
-                    break
+        vehicle = vehicle_from_params(request.query_params)
+        if vehicle:
+            compatible_only = request.query_params.get('compatible_only', '').lower() in ('1', 'true')
+            results = with_compatibility(results, vehicle, compatible_only=compatible_only)
+        results = results[:SEARCH_LIMIT]
         
         serializer = PartCatalogSerializer(
             results, 
@@ -253,6 +314,28 @@ class PartCatalogViewSet(viewsets.ReadOnlyModelViewSet):
         )
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='lookup')
+    def lookup(self, request):
+        """
+        Resolve an exact part number (primary, alternate or superseded) to its catalog entries,
+        canonical entry first. Served from rfqs/lookup.py's cache, misses included.
+        Query params:
+        - part_number: part number in any formatting (hyphens/spaces ignored)
+        """
+        part_number = request.query_params.get('part_number', '').strip()
+        if not part_number:
+            return Response({'error': 'part_number parameter is required'}, status=400)
+
+        ids = part_ids(part_number)
+        if not ids:
+            return Response([])
+        results = sorted(
+            PartCatalog.objects.select_related('make', 'model').prefetch_related('cross_references').filter(pk__in=ids),
+            key=lambda part: ids.index(part.pk)
+        )
+        serializer = PartCatalogSerializer(results, many=True, context={'request': request})
+        return Response(serializer.data)
+
 
 from .models import SavedVehicle
 from .serializers import SavedVehicleSerializer
@@ -1,7 +1,7 @@
 import React, { useEffect, useState, useRef } from 'react';
 import { View, Text, ScrollView, TouchableOpacity, Alert, ActivityIndicator } from 'react-native';
 import { useNavigation } from '@react-navigation/native';
-import api, { BASE_URL } from '../lib/api';
+import api, { BASE_URL, getAuthToken } from '../lib/api';
 import { Ionicons } from '@expo/vector-icons';
 
 interface LiveBidViewProps {
@@ -80,51 +80,60 @@ export default function LiveBidView({ rfqId, isWorkshop, excludeItemIds = [] }:
         // Initial fetch
         fetchBids();
 
-        // WebSocket Connection
-        const wsProtocol = BASE_URL.startsWith('https') ? 'wss' : 'ws';
-        const wsHost = BASE_URL.replace(/^https?:\/\//, '').split('/')[0];
-        const wsUrl = `${wsProtocol}://${wsHost}/ws/rfqs/${rfqId}/`;
-
-        console.log('Connecting to WS:', wsUrl);
-        const ws = new WebSocket(wsUrl);
-        wsRef.current = ws;
-
-        ws.onopen = () => {
-            console.log('WS Connected');
-            setStatus('Live');
-        };
-
-        ws.onmessage = (e) => {
-            const data = JSON.parse(e.data);
-            if (data.type === 'bid_placed') {
-                console.log('New Bid:', data.bid);
-                // For vendors, only show their own bids
-                if (!isWorkshop && currentUser && data.bid.vendor !== currentUser.id) {
-                    console.log('Filtering out bid from another vendor');
-                    return;
-                }
-                // Filter out bids for excluded items
-                if (excludeItemIds.includes(data.bid.rfq_item)) {
-                    console.log('Filtering out bid for ordered item');
-                    return;
+        // WebSocket Connection (authenticated with the same token as the REST API)
+        let ws: WebSocket | null = null;
+        let cancelled = false;
+
+        const connect = async () => {
+            const token = await getAuthToken();
+            if (cancelled) return;
+            const wsProtocol = BASE_URL.startsWith('https') ? 'wss' : 'ws';
+            const wsHost = BASE_URL.replace(/^https?:\/\//, '').split('/')[0];
+            const wsUrl = `${wsProtocol}://${wsHost}/ws/rfqs/${rfqId}/?token=${encodeURIComponent(token ?? '')}`;
+
+            console.log('Connecting to WS:', `${wsProtocol}://${wsHost}/ws/rfqs/${rfqId}/`);
+            ws = new WebSocket(wsUrl);
+            wsRef.current = ws;
+
+            ws.onopen = () => {
+                console.log('WS Connected');
+                setStatus('Live');
+            };
+
+            ws.onmessage = (e) => {
+                const data = JSON.parse(e.data);
+                if (data.type === 'bid_placed') {
+                    console.log('New Bid:', data.bid);
+                    // For vendors, only show their own bids
+                    if (!isWorkshop && currentUser && data.bid.vendor !== currentUser.id) {
+                        console.log('Filtering out bid from another vendor');
+                        return;
+                    }
+                    // Filter out bids for excluded items
+                    if (excludeItemIds.includes(data.bid.rfq_item)) {
+                        console.log('Filtering out bid for ordered item');
+                        return;
+                    }
+
+                    setBids(prev => [data.bid, ...prev]);
                 }
+            };
 
-                setBids(prev => [data.bid, ...prev]);
-            }
-        };
-
-        ws.onerror = (e) => {
-            console.log('WS Error:', e);
-            setStatus('Connection Error');
-        };
+            ws.onerror = (e) => {
+                console.log('WS Error:', e);
+                setStatus('Connection Error');
+            };
 
-        ws.onclose = () => {
-            console.log('WS Closed');
-            setStatus('Disconnected');
+            ws.onclose = () => {
+                console.log('WS Closed');
+                setStatus('Disconnected');
+            };
         };
+        connect();
 
         return () => {
-            ws.close();
+            cancelled = true;
+            ws?.close();
         };
     }, [rfqId]); // Only reconnect when rfqId changes
 